@@ -1,163 +1,10 @@
-import json
-import numpy as np
-
-from copy import deepcopy
-from abc import ABCMeta, abstractmethod
-
 from PyQt5.QtWidgets import QMessageBox
 
-"""
-    The Model of the MVC implementation is used to retain the useful data (it should be linked to a DB or something
-    like that, but since there are a few data I didn't want to overkill it) and to dispatch them to the various 
-    views via the Controller. Also, I've decided to send the updated data as return value of the model methods (where
-    possible), since it is faster than using specific function calls like getters and setters and this way you still
-    don't access directly the stored data, therefore not violating the MVC principle.
-"""
-
-
-class Model:
-
-    def __init__(self, squareEdge, pixmapWidth, pixmapHeight):
-
-        # state initialization
-        self.squareEdge = squareEdge
-        self.pixmapWidth = pixmapWidth
-        self.pixmapHeight = pixmapHeight
-        self.numRows = int(self.pixmapHeight / self.squareEdge)
-        self.numCols = int(self.pixmapWidth / self.squareEdge)
-        self.coloredPositions = []
-        self.colored = np.zeros((self.numRows, self.numCols))
-        self.oldPos = []
-        self.jsonData = []
-        self.patternsNames = []
-        self.loadJSON()
-
-        # no need to pass the following attributes
-        self.minX = 0
-        self.minY = 0
-        self.maxX = 0
-        self.maxY = 0
-
-    """ 
-        This method provides a way to compute the smallest grid that contains dots of interest: since a dead cell
-        can become alive iff there are alive cells in its neighborhood, there's no point in computing values for
-        dead cells that are not close to living cells. Hence, by updating the (x, y) positions of both the 
-        closest and the farthest cell wrt to the top-left corner, you can find a sub grid with all the interesting 
-        cells and also save quite a lot of computations (even if it's not the minimum number).
-    """
-
-    def minMax(self):
-        if self.coloredPositions.__len__() != 0:
-            self.minX = min([x[0] for x in self.coloredPositions])
-            self.minY = min([x[1] for x in self.coloredPositions])
-            self.maxX = max([x[0] for x in self.coloredPositions])
-            self.maxY = max([x[1] for x in self.coloredPositions])
-        else:
-            self.minX = 0
-            self.minY = 0
-            self.maxX = 0
-            self.maxY = 0
-
-    def updatePositions(self, row, col):
-
-        if (row, col) not in self.coloredPositions:
-            # now the painter actually draws the rectangle in the desired position
-            self.appendPosition(row, col)
-            self.minMax()
-            return True
-        else:
-            # if the selected position is already colored, by clicking on it we can erase the drawn rectangle
-            self.removePosition(row, col)
-            self.minMax()
-            return False
-
-    def appendPosition(self, row, col):
-        self.coloredPositions.append((row, col))
-        self.coloredPositions = list(set(self.coloredPositions))
-        self.colored[row, col] = 1
-        self.minMax()
-
-    def removePosition(self, row, col):
-        self.coloredPositions.remove((row, col))
-        self.colored[row, col] = 0
-        self.minMax()
-
-    def updateCells(self):
-        tmp = []
-        tmp_colored = deepcopy(self.colored[self.minX - 1: self.maxX + 2, self.minY - 1: self.maxY + 2])
-        results = []
-        oldestPos = self.oldPos
-        self.oldPos = deepcopy(self.coloredPositions)
-
-        # necessary to avoid a numpy bug
-        if len(tmp_colored) != 0:
-            itr = np.nditer(tmp_colored, flags=['multi_index'])
-        else:
-            return oldestPos, self.oldPos, results
-        for x in itr:
-            indexX = itr.multi_index[0]
-            indexY = itr.multi_index[1]
-            if x == 0:
-                # handling the corner cases
-                if indexX == 0 and indexY == 0:
-                    numNeighs = np.sum(tmp_colored[indexX: indexX + 2, indexY: indexY + 2])
-                elif indexX == 0:
-                    numNeighs = np.sum(tmp_colored[indexX: indexX + 2, indexY - 1: indexY + 2])
-                elif indexY == 0:
-                    numNeighs = np.sum(tmp_colored[indexX - 1: indexX + 2, indexY: indexY + 2])
-                else:
-                    numNeighs = np.sum(tmp_colored[indexX - 1: indexX + 2, indexY - 1: indexY + 2])
-                # applying the game rules
-                if numNeighs == 3:
-                    tmp.append((indexX + self.minX - 1, indexY + self.minY - 1))
-            # if the current element of the grid is a 1, it can't be a corner square, so there's no need to handle
-            # the cases
-            else:
-                numNeighs = np.sum(tmp_colored[indexX - 1: indexX + 2, indexY - 1: indexY + 2]) - 1
-                if numNeighs < 2 or numNeighs > 3:
-                    tmp.append((indexX + self.minX - 1, indexY + self.minY - 1))
-        for el in tmp:
-            results.append([self.updatePositions(el[0], el[1]), el[0], el[1]])
-        return oldestPos, self.oldPos, results
-
-    def clearAll(self):
-
-        self.oldPos = []
-        self.coloredPositions = []
-        self.colored = np.zeros((self.numRows, self.numCols))
-
-
-    def loadPattern(self, index):
-        # getting the useful pieces of information
-        pattern = self.jsonData[self.patternsNames[index]]["pattern"]
-        posX = self.jsonData[self.patternsNames[index]]["position"][0]
-        posY = self.jsonData[self.patternsNames[index]]["position"][1]
-        shapeX = self.jsonData[self.patternsNames[index]]["shape"][0]
-        shapeY = self.jsonData[self.patternsNames[index]]["shape"][1]
-        self.clearAll()
-        if self.numCols >= shapeX + posX and self.numCols >= shapeY + posY:
-            for r in range(pattern.__len__()):
-                for c in range(pattern[r].__len__()):
-                    if pattern[r][c] == 1:
-                        self.appendPosition(r + posX, c + posY)
-        else:
-            # if a pattern is too large to be drawn in the window, a little popup appears
-            self.showErrorPopup()
-
-        return deepcopy(self.coloredPositions)
-
-    def loadJSON(self):
-        # this is called when the KnownPatternsBox is instantiated
-        with open('patterns.json', 'r') as f:
-            self.jsonData = json.load(f)
-            self.patternsNames = list(self.jsonData.keys())
-
-    def showErrorPopup(self):
-        msg = QMessageBox()
-        msg.setWindowTitle('Error')
-        msg.setText('Cannot draw pattern: the grid is too small.')
-        msg.exec_()
-
+from life.engine import noPositions
+from life.model import Model, PatternTooLargeError
+from life.profiler import profiler
+from life.snapshot import readSnapshot, writeSnapshot
+from life.worker import SimulationWorker
 
 """
     I've been thinking a lot about whether to make a controller for all the MainWindow or just for some of the
@@ -176,6 +23,10 @@ class Model:
       described above.
 """
 
+# a jump runs on the GUI thread, so it computes at most this many generations one by one (next to the border of the
+# board, on a torus or with a Generations rule): the longer ones stop there
+MAX_JUMP_STEPS = 1000
+
 
 class Controller:
 
@@ -184,9 +35,14 @@ class Controller:
         self.model = model
         self.canvasView = canvasView
         self.patternBoxView = patternBoxView
+        # the background thread that runs the game after pressing Start
+        self.worker = None
+        # whether the game is stopped as soon as it enters a cycle (see life/cycles.py)
+        self.pauseOnCycle = False
 
     def updatePositions(self, row, col):
-        create = self.model.updatePositions(row, col)
+        with self.model.lock:
+            create = self.model.updatePositions(row, col)
         if create:
             self.canvasView.drawRect(row, col, True)
         else:
@@ -194,35 +50,171 @@ class Controller:
 
     # the main method of the Controller: the model updates the cells according to the game rules, then gives back the
     # updated positions and the Controller tells the view what to do accordingly to the model's data.
+    # (while the game runs in the background, the generations are computed by the worker instead)
     def updateCells(self):
-        oldestPos, oldPos, results = self.model.updateCells()
-        if self.canvasView.history:
-            for el in oldestPos:
-                # erasing grandpa squares
-                self.canvasView.eraseRect(el[0], el[1])
-            for el in oldPos:
-                # drawing parent square
-                self.canvasView.drawRect(el[0], el[1], False)
-        for el in results:
-            # drawing the current generation
-            if el[0]:
-                self.canvasView.drawRect(el[1], el[2], True)
-            else:
-                if self.canvasView.history:
-                    if (el[1], el[2]) not in oldPos:
-                        self.canvasView.eraseRect(el[1], el[2])
-                else:
-                    self.canvasView.eraseRect(el[1], el[2])
+        if self.worker is not None:
+            return
+        start = profiler.start()
+        previous, change = self.model.updateCells()
+        profiler.stop('compute', start)
+        profiler.sample('diff size', change[0].__len__() + change[1].__len__())
+        start = profiler.start()
+        self.canvasView.drawGeneration(previous, change)
+        profiler.stop('draw', start)
+
+    def jumpGenerations(self, generations):
+        if self.worker is not None:
+            return
+        start = profiler.start()
+        target = self.model.generation + generations
+        previous, change = self.model.jumpGenerations(generations, MAX_JUMP_STEPS)
+        profiler.stop('jump', start)
+        profiler.sample('diff size', change[0].__len__() + change[1].__len__())
+        start = profiler.start()
+        self.canvasView.drawGeneration(previous, change)
+        profiler.stop('draw', start)
+        if self.model.generation < target:
+            self.showErrorPopup('The jump stopped at generation {}: at most {} generations are computed one by one '
+                                '(next to the border, on a torus or with a Generations rule).'
+                                .format(self.model.generation, MAX_JUMP_STEPS))
+
+    # rewinding the game through the generations kept by the Model history: steps < 0 goes back, steps > 0 forward
+    def scrub(self, steps):
+        if self.worker is not None:
+            return
+        previous, change = self.model.scrub(steps)
+        self.canvasView.drawGeneration(previous, change)
+
+    def stepBack(self):
+        self.scrub(-1)
+
+    """
+        The widgets that show the state of the game on a timer (the HistorySlider, the CycleLabel and the StartButton
+        checking for cycles) must not wait for the worker to finish a generation, so they never take the Model lock:
+        they read values that the Model replaces as a whole after each change, which are always consistent.
+    """
+
+    # the number of changes that can be rewound and of the rewound ones that can be applied again
+    def historyRange(self):
+        return self.model.history.range
 
     # a bit messy, but since there's the history to handle I couldn't avoid that
     def clearAll(self):
-        # perform the cleanUp in the view
-        self.canvasView.clearAll()
-        self.model.clearAll()
+        with self.model.lock:
+            # perform the cleanUp in the view
+            self.canvasView.clearAll()
+            self.model.clearAll()
+            self.discardSnapshots()
 
 
     def loadPattern(self, index):
-        self.clearAll()
-        positions = self.model.loadPattern(index)
-        for p in positions:
-            self.canvasView.drawRect(p[0], p[1], True)
+        with self.model.lock:
+            self.clearAll()
+            try:
+                positions = self.model.loadPattern(index)
+            except PatternTooLargeError as e:
+                # if a pattern is too large to be drawn in the window, a little popup appears
+                self.showErrorPopup(str(e))
+                positions = noPositions()
+        for row, col in positions.tolist():
+            self.canvasView.drawRect(row, col, True)
+
+    # changes the rule of the game (a B/S string or the name of a known rule), telling whether it was valid
+    def setRule(self, rule):
+        with self.model.lock:
+            try:
+                previous, change = self.model.setRule(rule)
+            except ValueError as e:
+                self.showErrorPopup('Invalid rule: {}'.format(e))
+                return False
+        # while the game runs in the background, the removed cells show up in the next snapshot
+        if self.worker is None:
+            self.canvasView.drawGeneration(previous, change)
+        return True
+
+    def saveSnapshot(self, path):
+        try:
+            with self.model.lock:
+                writeSnapshot(path, self.model)
+        except OSError as e:
+            self.showErrorPopup('Cannot save the board: {}'.format(e))
+
+    # the file is read and checked before the board is cleared, so that a bad one leaves the board as it is
+    def loadSnapshot(self, path):
+        with self.model.lock:
+            try:
+                with readSnapshot(path) as snapshot:
+                    self.model.checkSnapshot(snapshot)
+                    self.clearAll()
+                    positions = self.model.loadSnapshot(snapshot)
+            except (OSError, ValueError, PatternTooLargeError) as e:
+                self.showErrorPopup('Cannot open the board: {}'.format(e))
+                return
+        for row, col in positions.tolist():
+            self.canvasView.drawRect(row, col, True)
+
+    """
+        Running the game in the background: the worker computes the generations at the requested rate, while the
+        StartButton timer calls showLatestSnapshot() at each frame, so that only the most recent generation is drawn.
+    """
+
+    def startSimulation(self, fps):
+        if self.worker is not None:
+            return
+        with self.model.lock:
+            cells, oldCells = self.model.stateArrays()
+        self.canvasView.setShownCells(cells, oldCells)
+        # the views that only show a part of the board capture it themselves (see viewport.py)
+        self.worker = SimulationWorker(self.model, fps, capture=getattr(self.canvasView, 'captureCells', None))
+        self.worker.start()
+
+    def stopSimulation(self):
+        if self.worker is None:
+            return
+        self.worker.stop()
+        self.showLatestSnapshot()
+        self.worker = None
+        # the canvas goes back to drawing from the Model
+        self.canvasView.endSnapshots()
+
+    def setFps(self, fps):
+        if self.worker is not None:
+            self.worker.fps = fps
+
+    def showLatestSnapshot(self):
+        if self.worker is None:
+            return
+        snapshot = self.worker.latestSnapshot()
+        if snapshot is not None:
+            start = profiler.start()
+            self.canvasView.drawSnapshot(snapshot[1])
+            profiler.stop('draw', start)
+
+    # the cycle found by the Model as (first generation, period), or None
+    def cycleStatus(self):
+        return self.model.cycle
+
+    # the cycles are only looked for while the game is to be paused on them, since hashing every generation has a cost
+    def setPauseOnCycle(self, pause):
+        self.pauseOnCycle = bool(pause)
+        with self.model.lock:
+            self.model.setCycleDetection(self.pauseOnCycle)
+
+    # called at each frame while the game runs: once the game is in a cycle, there's nothing new to see
+    def shouldPause(self):
+        return self.worker is not None and self.pauseOnCycle and self.cycleStatus() is not None
+
+    def discardSnapshots(self):
+        if self.worker is not None:
+            self.worker.latestSnapshot()
+
+    def achievedRate(self):
+        if self.worker is None:
+            return 0
+        return self.worker.achievedRate()
+
+    def showErrorPopup(self, text):
+        msg = QMessageBox()
+        msg.setWindowTitle('Error')
+        msg.setText(text)
+        msg.exec_()
@@ -0,0 +1,225 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from life import Model
+
+"""
+    Benchmark suite: it measures the stepping engines on the known patterns and on seeded random soups of
+    several sizes, the time needed to load the patterns and (if PyQt5 is available) the draw paths of the canvases,
+    rendered offscreen, and the time the GUI takes to show its first frame. Every measurement is printed as a JSON
+    line, so that the results of two runs can be compared by a script. For example:
+
+        python benchmark.py --sizes 100 500 1000 --generations 50 --output results.jsonl
+
+    Timings and peak memory are measured in separate runs, since tracing the allocations slows the code down.
+"""
+
+# the engines that can be benchmarked, as the arguments given to the Model. HashLife is used through the jump API, on
+# the plane: on a bounded board the generations next to the border would be computed one by one
+ENGINES = {
+    'dense-box': {'backend': 'dense', 'stepping': 'box'},
+    'dense-frontier': {'backend': 'dense', 'stepping': 'frontier'},
+    'packed-box': {'backend': 'packed', 'stepping': 'box'},
+    'packed-frontier': {'backend': 'packed', 'stepping': 'frontier'},
+    'parallel-box': {'backend': 'parallel', 'stepping': 'box'},
+    'hashlife': {'backend': 'dense', 'stepping': 'box', 'topology': 'plane'},
+}
+MEMORY_STEPS = 3
+# the cycles aren't looked for, otherwise the oscillators and the still lifes would be replayed from the history
+# instead of being computed, and a short history is enough to keep its cost in the measurements
+HISTORY_SIZE = 10
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description='Benchmark the Game of Life engines and renderers.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 1000], help='edges of the soups grids')
+    parser.add_argument('--density', type=float, default=0.3, help='probability of a living cell in the soups')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0], help='random seeds of the soups')
+    parser.add_argument('--generations', type=int, default=50, help='generations per measurement')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES.keys()), default=list(ENGINES.keys()))
+    parser.add_argument('--patterns-grid', type=int, nargs=2, default=[200, 200], metavar=('ROWS', 'COLS'),
+                        help='grid size used for the patterns of patterns.json')
+    parser.add_argument('--no-render', action='store_true', help='skip the canvas benchmarks')
+    parser.add_argument('--output', help='file where the JSON lines are written, besides the standard output')
+    return parser.parse_args(argv)
+
+
+def soup(size, density, seed):
+    rng = np.random.default_rng(seed)
+    return np.argwhere(rng.random((size, size)) < density)
+
+
+def makeModel(engine, numRows, numCols, pattern, row=0, col=0):
+    model = Model(1, numCols, numRows, detectCycles=False, historySize=HISTORY_SIZE, **ENGINES[engine])
+    model.placePositions(pattern, row, col)
+    return model
+
+
+def runGenerations(model, engine, generations):
+    if engine == 'hashlife':
+        model.jumpGenerations(generations)
+    else:
+        for _ in range(generations):
+            model.updateCells()
+
+
+def benchmarkStep(engine, workload, numRows, numCols, pattern, row, col, generations):
+    model = makeModel(engine, numRows, numCols, pattern, row, col)
+    start = time.perf_counter()
+    runGenerations(model, engine, generations)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    model = makeModel(engine, numRows, numCols, pattern, row, col)
+    runGenerations(model, engine, min(generations, MEMORY_STEPS))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'benchmark': 'step', 'engine': engine, 'workload': workload, 'rows': numRows, 'cols': numCols,
+            'generations': generations, 'ms_per_step': 1000 * elapsed / generations,
+            'generations_per_sec': generations / elapsed if elapsed > 0 else None,
+            'peak_memory_mb': peak / 2 ** 20}
+
+
+def benchmarkLoadPattern(numRows, numCols):
+    results = []
+    model = Model(1, numCols, numRows)
+    for index, name in enumerate(model.patternsNames):
+        start = time.perf_counter()
+        model.loadPattern(index)
+        elapsed = time.perf_counter() - start
+        results.append({'benchmark': 'load_pattern', 'workload': name, 'rows': numRows, 'cols': numCols,
+                        'ms': 1000 * elapsed})
+    return results
+
+
+"""
+    The canvases are rendered offscreen: each frame is the drawing of a generation diff followed by a synchronous
+    repaint of the widget, so that the cost of Qt painting is included.
+"""
+
+
+def benchmarkRender(renderer, size, density, seed, generations):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtGui import QPixmap
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QApplication
+    from canvas import CanvasView
+    from imagecanvas import ImageCanvasView
+    from viewport import ViewportCanvasView
+
+    app = QApplication.instance() or QApplication([])
+    squareEdge = 2
+    model = makeModel('dense-box', size, size, soup(size, density, seed))
+    # the canvases read the square edge from the Model
+    if renderer == 'viewport':
+        # the viewport shows at most 800 x 800 pixels of the board, whatever its size
+        canvas = ViewportCanvasView(model, squareEdge)
+        canvas.setFixedSize(min(squareEdge * size + 1, 800), min(squareEdge * size + 1, 800))
+    else:
+        if renderer == 'image':
+            canvas = ImageCanvasView(model)
+        else:
+            pixmap = QPixmap(squareEdge * size + 1, squareEdge * size + 1)
+            pixmap.fill(Qt.white)
+            canvas = CanvasView(pixmap, model)
+        model.squareEdge = squareEdge
+        canvas.setFixedSize(squareEdge * size + 1, squareEdge * size + 1)
+    canvas.drawGrid()
+    canvas.show()
+    app.processEvents()
+
+    elapsed = 0
+    for _ in range(generations):
+        previous, change = model.updateCells()
+        start = time.perf_counter()
+        canvas.drawGeneration(previous, change)
+        app.processEvents()
+        canvas.repaint()
+        elapsed += time.perf_counter() - start
+    canvas.close()
+    if renderer == 'painter':
+        # the CanvasView painter is never closed by the GUI, but the pixmap can't be destroyed while it is active
+        canvas.painter.end()
+    return {'benchmark': 'render', 'renderer': renderer, 'workload': 'soup-{}-{}-{}'.format(size, density, seed),
+            'rows': size, 'cols': size, 'generations': generations, 'ms_per_frame': 1000 * elapsed / generations,
+            'frames_per_sec': generations / elapsed if elapsed > 0 else None}
+
+
+# the time to the first frame of the whole application, in a new process (see main.py --measure-startup)
+def benchmarkStartup(renderer, size):
+    # the square edge keeps the board within a screen
+    squareEdge = max(1, min(10, 1000 // size))
+    environment = dict(os.environ)
+    environment.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    output = subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py'),
+                             '--renderer', renderer, '--rows', str(size), '--cols', str(size),
+                             '--edge', str(squareEdge), '--measure-startup'],
+                            env=environment, capture_output=True, text=True, check=True).stdout
+    match = re.search(r'first frame after (\d+) ms \(target (\d+) ms\)', output)
+    return {'benchmark': 'startup', 'renderer': renderer, 'rows': size, 'cols': size, 'square_edge': squareEdge,
+            'ms_to_first_frame': int(match.group(1)), 'target_ms': int(match.group(2))}
+
+
+def emit(result, outputFile):
+    line = json.dumps(result)
+    print(line)
+    sys.stdout.flush()
+    if outputFile is not None:
+        outputFile.write(line + '\n')
+        outputFile.flush()
+
+
+def main(argv=None):
+    args = parseArguments(argv)
+    outputFile = open(args.output, 'w') if args.output is not None else None
+
+    # the patterns are placed at their patterns.json positions (or in the centre), on a grid large enough to let
+    # them evolve
+    numRows, numCols = args.patterns_grid
+    patternsModel = Model(1, numCols, numRows)
+    library = patternsModel.library
+    for index, name in enumerate(library.names):
+        pattern = library.load(index)
+        position = library.entries[index]['position']
+        row, col = position if position is not None else patternsModel.centredPosition(pattern)
+        for engine in args.engines:
+            emit(benchmarkStep(engine, name, numRows, numCols, pattern, row, col, args.generations), outputFile)
+
+    for size in args.sizes:
+        for seed in args.seeds:
+            pattern = soup(size, args.density, seed)
+            workload = 'soup-{}-{}-{}'.format(size, args.density, seed)
+            for engine in args.engines:
+                emit(benchmarkStep(engine, workload, size, size, pattern, 0, 0, args.generations), outputFile)
+
+    for result in benchmarkLoadPattern(numRows, numCols):
+        emit(result, outputFile)
+
+    if not args.no_render:
+        try:
+            import PyQt5
+        except ImportError:
+            print('PyQt5 is not available: skipping the render benchmarks', file=sys.stderr)
+        else:
+            for size in args.sizes:
+                for renderer in ('painter', 'image', 'viewport'):
+                    emit(benchmarkRender(renderer, size, args.density, args.seeds[0], args.generations), outputFile)
+            for size in args.sizes:
+                for renderer in ('painter', 'image', 'viewport'):
+                    emit(benchmarkStartup(renderer, size), outputFile)
+
+    if outputFile is not None:
+        outputFile.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,26 +1,57 @@
-from PyQt5.QtCore import QTimer, QObject
+import time
+
+from PyQt5.QtCore import Qt, QTimer, QObject
 from PyQt5.QtGui import QMouseEvent
-from PyQt5.QtWidgets import QPushButton, QComboBox, QCheckBox
+from PyQt5.QtWidgets import QPushButton, QComboBox, QCheckBox, QSpinBox, QFileDialog
+
+from life.profiler import profiler
+from life.rules import RULES
+from life.snapshot import SNAPSHOT_EXTENSION
 
 
 class StartButton(QPushButton):
 
     def __init__(self, controller):
         super().__init__('Start')
+        # the generations are computed by a background worker (see life/worker.py), so the timer only draws the latest
+        # one at each frame
         self.timer = QTimer()
         self.controller = controller
-        self.timer.timeout.connect(self.controller.updateCells)
+        self.timer.timeout.connect(self.frame)
         self.fps = 1
+        self.lastFrame = None
+
+    def frame(self):
+        # how much later than requested by the fps the frame comes, e.g. because the GUI thread was busy
+        now = time.perf_counter()
+        if self.lastFrame is not None:
+            profiler.sample('lateness (ms)', 1000 * (now - self.lastFrame) - self.timer.interval())
+        self.lastFrame = now
+        self.controller.showLatestSnapshot()
+        if self.controller.shouldPause():
+            self.timer.stop()
+            self.controller.stopSimulation()
 
     def mousePressEvent(self, e: QMouseEvent):
-        self.timer.start(1000 * (1 / self.fps))
+        self.controller.startSimulation(self.fps)
+        self.lastFrame = None
+        self.timer.start(int(1000 * (1 / self.fps)))
         super().mousePressEvent(e)
 
     def setFps(self, value):
         self.fps = value
+        self.controller.setFps(value)
         if self.timer.isActive():
             self.timer.stop()
-            self.timer.start(1000 * (1 / self.fps))
+            self.timer.start(int(1000 * (1 / self.fps)))
+
+
+class BackButton(QPushButton, QObject):
+
+    def __init__(self, controller):
+        super().__init__('Back')
+        self.controller = controller
+        self.clicked.connect(self.controller.stepBack)
 
 
 class StepButton(QPushButton, QObject):
@@ -34,14 +65,42 @@ class StepButton(QPushButton, QObject):
         super().mousePressEvent(e)
 
 
+"""
+    The JumpButton advances the game by the number of generations chosen in the JumpSpinBox in a single step, using
+    the HashLife engine of the Model. The generations that HashLife can't compute (next to the border of the board)
+    are computed one by one, up to a limit (see MVC.py).
+"""
+class JumpButton(QPushButton, QObject):
+
+    def __init__(self, controller, spinBox):
+        super().__init__('Jump')
+        self.controller = controller
+        self.spinBox = spinBox
+        self.clicked.connect(self.jump)
+
+    def jump(self):
+        self.controller.jumpGenerations(self.spinBox.value())
+
+
+class JumpSpinBox(QSpinBox):
+
+    def __init__(self):
+        super().__init__()
+        self.setMinimum(1)
+        self.setMaximum(1000000000)
+        self.setValue(1000)
+
+
 class StopButton(QPushButton, QObject):
 
-    def __init__(self, timer):
+    def __init__(self, controller, timer):
         super().__init__('Stop')
+        self.controller = controller
         self.timer = timer
 
     def mousePressEvent(self, e: QMouseEvent):
         self.timer.stop()
+        self.controller.stopSimulation()
         super().mousePressEvent(e)
 
 
@@ -53,6 +112,38 @@ class ClearButton(QPushButton, QObject):
         self.clicked.connect(self.controller.clearAll)
 
 
+"""
+    Saving and opening the board as a binary snapshot (see life/snapshot.py). The board can be saved while the game
+    is running, since the Controller takes the Model lock.
+"""
+class SaveButton(QPushButton, QObject):
+
+    def __init__(self, controller):
+        super().__init__('Save')
+        self.controller = controller
+        self.clicked.connect(self.save)
+
+    def save(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Save board', '', 'Snapshots (*{})'.format(SNAPSHOT_EXTENSION))
+        if path:
+            if not path.endswith(SNAPSHOT_EXTENSION):
+                path += SNAPSHOT_EXTENSION
+            self.controller.saveSnapshot(path)
+
+
+class OpenButton(QPushButton, QObject):
+
+    def __init__(self, controller):
+        super().__init__('Open')
+        self.controller = controller
+        self.clicked.connect(self.open)
+
+    def open(self):
+        path, _ = QFileDialog.getOpenFileName(self, 'Open board', '', 'Snapshots (*{})'.format(SNAPSHOT_EXTENSION))
+        if path:
+            self.controller.loadSnapshot(path)
+
+
 class KnownPatternsBox(QComboBox, QObject):
 
     def __init__(self, model):
@@ -69,14 +160,47 @@ class KnownPatternsBox(QComboBox, QObject):
     """
     def addController(self, controller):
         self.controller = controller
-        for el in self.model.patternsNames:
-            self.addItem(el)
+        # the patterns are indexed once the window is shown, so that a large library doesn't delay it
+        QTimer.singleShot(0, self.addPatterns)
+
+    def addPatterns(self):
+        for index in range(self.model.patternsNames.__len__()):
+            self.addItem(self.model.library.label(index))
 
     def loadPattern(self):
         if self.controller is not None:
             self.controller.loadPattern(self.currentIndex())
 
 
+"""
+    The rule picker offers the known rules by name, but any rule can be typed in B/S notation (e.g. B36/S23, or
+    B2/S/C3 for a Generations rule). An invalid rule is reported by the Controller and the previous one is restored.
+"""
+class RuleBox(QComboBox):
+
+    def __init__(self, controller):
+        super().__init__()
+        self.controller = controller
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.NoInsert)
+        for name, rule in RULES.items():
+            self.addItem(name)
+            self.setItemData(self.count() - 1, rule.notation(), Qt.ToolTipRole)
+        self.setToolTip('Rule of the game, in B/S notation (e.g. B36/S23, or B2/S/C3 with dying states)')
+        self.rule = self.currentText()
+        self.activated.connect(self.applyRule)
+        self.lineEdit().returnPressed.connect(self.applyRule)
+
+    def applyRule(self):
+        text = self.currentText().strip()
+        if text == self.rule:
+            return
+        if self.controller.setRule(text):
+            self.rule = text
+        else:
+            self.setEditText(self.rule)
+
+
 """
     This is a switch on the canvas' history attribute. With this dummy class declaration you are able to switch from
     'history mode' to 'present mode' in realtime just by declaring this object in the MainWindow.
@@ -90,3 +214,43 @@ class HistoryCheckBox(QCheckBox):
         self.stateChanged.connect(self.canvas.setHistory)
 
 
+"""
+    The profiler (see life/profiler.py) is enabled together with its overlay on the canvas, and the events recorded
+    while it's enabled can be exported as a trace file.
+"""
+class ProfilerCheckBox(QCheckBox):
+
+    def __init__(self, overlay):
+        super().__init__('Profiler')
+        self.overlay = overlay
+        self.stateChanged.connect(self.toggle)
+
+    def toggle(self, state):
+        if state:
+            profiler.enable()
+            self.overlay.show()
+        else:
+            profiler.disable()
+            self.overlay.hide()
+
+
+class ExportTraceButton(QPushButton, QObject):
+
+    def __init__(self):
+        super().__init__('Export trace')
+        self.clicked.connect(self.export)
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Export trace', 'trace.json', 'Traces (*.json)')
+        if path:
+            profiler.exportTrace(path)
+
+
+class PauseOnCycleCheckBox(QCheckBox):
+
+    def __init__(self, controller):
+        super().__init__('Pause on cycle')
+        self.controller = controller
+        self.stateChanged.connect(self.controller.setPauseOnCycle)
+
+
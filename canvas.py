@@ -1,7 +1,49 @@
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QMouseEvent, QPainter, QPen, QBrush, QPalette
+import numpy as np
+
+from PyQt5.QtCore import Qt, QRect, QTimer
+from PyQt5.QtGui import QMouseEvent, QPainter, QPen, QBrush, QPalette, QPixmap
 from PyQt5.QtWidgets import QLabel, QScrollArea
 
+from life.engine import changePositions
+from life.profiler import profiler
+
+"""
+    The grid lines are drawn by tiling a block of squares (each one with its top and left sides) over the board, and
+    then closing its bottom and right borders: a few calls instead of one per row and column, which made the startup
+    slow on large boards. The blocks are cached by square edge.
+"""
+
+GRID_TILE_SIZE = 128
+gridTiles = {}
+
+# the looks of a square, see CanvasView.squareColours()
+EMPTY = 0
+NEW = 1
+OLD = 2
+
+
+def gridTile(edge):
+    if edge not in gridTiles:
+        side = max(1, GRID_TILE_SIZE // edge) * edge
+        tile = QPixmap(side, side)
+        tile.fill(Qt.transparent)
+        painter = QPainter(tile)
+        painter.setPen(QPen(Qt.black))
+        for position in range(0, side, edge):
+            painter.drawLine(0, position, side - 1, position)
+            painter.drawLine(position, 0, position, side - 1)
+        painter.end()
+        gridTiles[edge] = tile
+    return gridTiles[edge]
+
+
+def drawGridLines(painter, edge, numRows, numCols):
+    width = edge * numCols
+    height = edge * numRows
+    painter.drawTiledPixmap(0, 0, width, height, gridTile(edge))
+    painter.drawLine(0, height, width, height)
+    painter.drawLine(width, 0, width, height)
+
 
 class CanvasView(QLabel):
 
@@ -29,15 +71,36 @@ class CanvasView(QLabel):
         self.oldBrush = QBrush(Qt.red)
         self.painter.setBrush(self.brush)
 
-    # when self.history switches from True to False, you need to get the latest oldPos and erase all its squares.
-    # Then, since there could be some intersections, you also need to get the latest position and redraw it.
+        # the area painted since the last repaint: drawing only marks it as dirty, then a single update of the widget
+        # is issued when control goes back to the event loop, no matter how many squares have been drawn
+        self.dirtyRect = QRect()
+        self.updatePending = False
+
+        # while the game runs in the background the canvas is drawn from snapshots of the grid: these are the cells
+        # shown by the last two of them, so that the next one can be drawn as a diff
+        self.shownCells = None
+        self.shownOldCells = None
+
+    # when self.history switches from True to False, you need to erase the squares of the previous state that are
+    # gone, and draw the current ones in green. When it switches from False to True, the current squares become the
+    # previous state, so they turn red
     def setHistory(self):
         self.history = not self.history
+        with self.model.lock:
+            gone, positions = self.shownPositions()
         if not self.history:
-            for el in self.model.oldPos:
-                self.eraseRect(el[0], el[1])
-            for el in self.model.coloredPositions:
-                self.drawRect(el[0], el[1], True)
+            for row, col in gone.tolist():
+                self.eraseRect(row, col)
+        for row, col in positions.tolist():
+            self.drawRect(row, col, not self.history)
+
+    # the positions on screen that were only in the previous state, and the current ones: they're the Model ones,
+    # unless the canvas is drawing snapshots
+    def shownPositions(self):
+        if self.shownCells is None:
+            oldPositions = changePositions(self.model.visible(self.model.lastChange[1]))
+            return oldPositions, self.model.visible(self.model.livePositions())
+        return np.argwhere((self.shownOldCells != 0) & (self.shownCells == 0)), np.argwhere(self.shownCells)
 
     """
         This has to be called right after the View object is instantiated. It works like a "subscribe()" method:
@@ -55,20 +118,11 @@ class CanvasView(QLabel):
             self.controller.updatePositions(int(ev.pos().y() / self.model.squareEdge),
                                             int(ev.pos().x() / self.model.squareEdge))
 
-        # to make the colored square appear, we need to update the window
-        self.window().update()
 
     def drawGrid(self):
         # if I know the grid square's edge length and the desired number of rows and columns, it is easy to
-        # draw a grid just by drawing lines between the right couple of points
-        x = 0
-        y = 0
-        for i in range(self.model.numRows + 1):
-            self.painter.drawLine(0, y, self.model.squareEdge * self.model.numCols, y)
-            y += self.model.squareEdge
-        for j in range(self.model.numCols + 1):
-            self.painter.drawLine(x, 0, x, self.model.squareEdge * self.model.numRows)
-            x += self.model.squareEdge
+        # draw a grid, one block of squares at a time
+        drawGridLines(self.painter, self.model.squareEdge, self.model.numRows, self.model.numCols)
 
     def drawRect(self, row, col, isNew):
         if isNew:
@@ -77,20 +131,100 @@ class CanvasView(QLabel):
             self.painter.setBrush(self.oldBrush)
         self.painter.drawRect(col * self.model.squareEdge, row * self.model.squareEdge, self.model.squareEdge,
                               self.model.squareEdge)
-        self.window().update()
+        profiler.count('paint calls')
+        if self.shownCells is not None and isNew:
+            self.shownCells[row, col] = 1
+        self.markDirty(row, col)
 
     def eraseRect(self, row, col):
         self.painter.eraseRect(col * self.model.squareEdge + 1, row * self.model.squareEdge + 1,
                                self.model.squareEdge - 1, self.model.squareEdge - 1)
-        self.window().update()
+        profiler.count('paint calls')
+        if self.shownCells is not None:
+            self.shownCells[row, col] = 0
+        self.markDirty(row, col)
+
+    def markDirty(self, row, col):
+        self.dirtyRect = self.dirtyRect.united(QRect(col * self.model.squareEdge, row * self.model.squareEdge,
+                                                     self.model.squareEdge + 1, self.model.squareEdge + 1))
+        if not self.updatePending:
+            self.updatePending = True
+            QTimer.singleShot(0, self.flush)
+
+    def flush(self):
+        self.updatePending = False
+        if not self.dirtyRect.isEmpty():
+            self.update(self.dirtyRect)
+            profiler.count('repaint requests')
+        self.dirtyRect = QRect()
+
+    # draws a whole generation diff (as given back by Model.updateCells()) with a single repaint. In history mode the
+    # previous state stays on screen in red: the squares that died in the previous change are gone for good, the
+    # ones born in it are no longer new, and the dead ones are left as they are
+    def drawGeneration(self, previous, change):
+        births, deaths = (changePositions(positions) for positions in change)
+        if self.history:
+            for row, col in changePositions(previous[1]).tolist():
+                # erasing grandpa squares
+                self.eraseRect(row, col)
+            for row, col in changePositions(previous[0]).tolist():
+                # drawing parent square
+                self.drawRect(row, col, False)
+        else:
+            for row, col in deaths.tolist():
+                self.eraseRect(row, col)
+        for row, col in births.tolist():
+            # drawing the current generation
+            self.drawRect(row, col, True)
+
+    def paintEvent(self, ev):
+        start = profiler.start()
+        super().paintEvent(ev)
+        profiler.stop('paint', start)
+
+    def setShownCells(self, cells, oldCells):
+        self.shownCells = cells
+        self.shownOldCells = oldCells
+
+    # once the game stops, the squares are brought in line with the current and previous states of the Model (the
+    # snapshots may have skipped the generations in between), and the canvas draws from the Model again
+    def endSnapshots(self):
+        with self.model.lock:
+            cells, oldCells = self.model.stateArrays()
+        shown = self.squareColours(self.shownCells, self.shownOldCells)
+        self.shownCells = None
+        self.shownOldCells = None
+        colours = self.squareColours(cells, oldCells)
+        for row, col in np.argwhere(colours != shown).tolist():
+            if colours[row, col] == EMPTY:
+                self.eraseRect(row, col)
+            else:
+                self.drawRect(row, col, colours[row, col] == NEW)
+
+    # what each square looks like: in history mode the cells of the previous state are red, and only the ones born
+    # since then are green
+    def squareColours(self, cells, oldCells):
+        colours = np.where(cells != 0, NEW, EMPTY).astype(np.uint8)
+        if self.history:
+            colours[oldCells != 0] = OLD
+        return colours
+
+    # draws the state of a snapshot as the diff with the one on screen
+    def drawSnapshot(self, cells):
+        shown = self.shownCells.copy()
+        previous = (np.argwhere(shown > self.shownOldCells), np.argwhere(shown < self.shownOldCells))
+        self.drawGeneration(previous, (np.argwhere(cells > shown), np.argwhere(cells < shown)))
+        self.shownOldCells = shown
+        self.shownCells = cells
 
     def clearAll(self):
-        for op in self.model.oldPos:
-            self.eraseRect(op[0], op[1])
-        for p in self.model.coloredPositions:
-            self.eraseRect(p[0], p[1])
-
-        self.window().update()
+        gone, positions = self.shownPositions()
+        for row, col in gone.tolist():
+            self.eraseRect(row, col)
+        for row, col in positions.tolist():
+            self.eraseRect(row, col)
+        if self.shownCells is not None:
+            self.shownOldCells[:] = 0
 
 
 
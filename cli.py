@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from life import Model, PatternTooLargeError, GRID_BACKENDS, STEPPING_MODES, TOPOLOGIES, readPositions, writePattern, \
+    readSnapshot, writeSnapshot
+from life.profiler import profiler
+from life.rules import CONWAY
+from life.snapshot import SNAPSHOT_EXTENSION
+
+"""
+    Command line runner: it plays the game without the GUI (and without Qt at all), as fast as the engines can go,
+    since there's no timer nor painting involved. For example:
+
+        python cli.py "Gosper Glider Gun" --rows 200 --cols 200 --generations 10000 --output gun.cells
+
+    The pattern is either the name of one of the known patterns (see life/library.py) or the path of a pattern file
+    (.rle, .lif or .cells).
+    The final state is written to the output file, as a plaintext pattern or, if the file name ends with '.json', as
+    the list of the living cells positions, or as a binary snapshot if it ends with '.snap'. Long runs can also save
+    a snapshot every few generations, and be resumed later by giving the snapshot as the pattern:
+
+        python cli.py big.rle --rows 10000 --cols 10000 --generations 1000000 --checkpoint big.snap
+        python cli.py big.snap --generations 1000000 --checkpoint big.snap
+
+    A resumed run takes the size, the topology and the rule of the board from the snapshot. Any other rule can be
+    given in B/S notation (see life/rules.py), e.g. HighLife with --rule B36/S23 or Brian's Brain with --rule B2/S/C3.
+"""
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description="Run Conway's Game of Life without the GUI.")
+    parser.add_argument('pattern', help='name of a known pattern, or path of a .rle, .lif, .cells or .snap file')
+    parser.add_argument('--rows', type=int, default=40, help='number of rows of the grid')
+    parser.add_argument('--cols', type=int, default=50, help='number of columns of the grid')
+    parser.add_argument('--generations', type=int, default=100, help='number of generations to compute')
+    parser.add_argument('--position', type=int, nargs=2, metavar=('ROW', 'COL'),
+                        help='top-left corner of the pattern (default: the one in patterns.json, or the centre)')
+    parser.add_argument('--backend', choices=list(GRID_BACKENDS.keys()), default='dense')
+    parser.add_argument('--stepping', choices=STEPPING_MODES, default='box')
+    parser.add_argument('--topology', choices=TOPOLOGIES, default='bounded',
+                        help="borders of the grid: 'torus' wraps around, 'plane' is infinite")
+    parser.add_argument('--rule', help="rule in B/S notation, or the name of a known rule (default: Conway's B3/S23)")
+    parser.add_argument('--hashlife', action='store_true',
+                        help='jump all the generations at once with the HashLife engine')
+    parser.add_argument('--report-every', type=int, default=0, metavar='N',
+                        help='print the population every N generations')
+    parser.add_argument('--skip-cycles', action='store_true',
+                        help='once the game is in a cycle, skip the remaining generations at once')
+    parser.add_argument('--output', help='file where the final state is written (.cells, .json or .snap)')
+    parser.add_argument('--checkpoint', metavar='PATH', help='snapshot file written during the run')
+    parser.add_argument('--profile', metavar='TRACE',
+                        help='measure every generation and write the trace to this file (Chrome trace format)')
+    parser.add_argument('--checkpoint-every', type=int, default=1000, metavar='N',
+                        help='generations between two checkpoints (default: 1000)')
+    return parser.parse_args(argv)
+
+
+def loadInitialPattern(model, args):
+    if os.path.isfile(args.pattern):
+        positions = readPositions(args.pattern)
+        position = args.position
+        if position is None:
+            position = model.centredPosition(positions)
+        model.placePositions(positions, position[0], position[1])
+    elif args.pattern in model.patternsNames:
+        index = model.patternsNames.index(args.pattern)
+        if args.position is None:
+            model.loadPattern(index)
+        else:
+            model.placePositions(model.library.load(index), args.position[0], args.position[1])
+    else:
+        raise ValueError('Unknown pattern: {}'.format(args.pattern))
+
+
+# the Model of a run: a new board with the pattern, or the board saved in a snapshot
+def createModel(args):
+    snapshot = None
+    if args.pattern.endswith(SNAPSHOT_EXTENSION):
+        snapshot = readSnapshot(args.pattern)
+        args.rows = snapshot.numRows
+        args.cols = snapshot.numCols
+        args.topology = snapshot.topology
+        if args.rule is None:
+            args.rule = snapshot.rule
+    # with a square edge of 1 the "pixmap" size is just the grid size
+    model = Model(1, args.cols, args.rows, backend=args.backend, stepping=args.stepping,
+                  topology=args.topology, rule=args.rule if args.rule is not None else CONWAY)
+    if snapshot is not None:
+        model.loadSnapshot(snapshot)
+        snapshot.close()
+    else:
+        loadInitialPattern(model, args)
+    return model
+
+
+def run(args):
+    model = createModel(args)
+    start = time.perf_counter()
+    if args.hashlife:
+        model.jumpGenerations(args.generations)
+    else:
+        for generation in range(1, args.generations + 1):
+            inCycle = model.cycle is not None
+            stepStart = profiler.start()
+            _, (births, deaths) = model.updateCells()
+            profiler.stop('compute', stepStart)
+            profiler.sample('diff size', births.__len__() + deaths.__len__())
+            if not inCycle and model.cycle is not None:
+                print('generation {}: period {} cycle since generation {}'.format(
+                    model.generation, model.cycle[1], model.cycle[0]))
+                if args.skip_cycles:
+                    model.jumpGenerations(args.generations - generation)
+                    break
+            if args.report_every > 0 and generation % args.report_every == 0:
+                print('generation {}: population {}'.format(model.generation, model.population))
+            if args.checkpoint is not None and generation % args.checkpoint_every == 0:
+                writeSnapshot(args.checkpoint, model)
+    if args.checkpoint is not None:
+        writeSnapshot(args.checkpoint, model)
+    elapsed = time.perf_counter() - start
+
+    rate = args.generations / elapsed if elapsed > 0 else float('inf')
+    print('{} generations in {:.3f} s ({:.1f} gen/s), final population {}'.format(
+        args.generations, elapsed, rate, model.population))
+    return model
+
+
+def writeOutput(model, args):
+    if args.output.endswith(SNAPSHOT_EXTENSION):
+        writeSnapshot(args.output, model, {'pattern': args.pattern})
+    elif args.output.endswith('.json'):
+        with open(args.output, 'w') as f:
+            json.dump({'generations': args.generations, 'rows': model.numRows, 'cols': model.numCols,
+                       'cells': model.livePositions().tolist()}, f)
+    else:
+        writePattern(args.output, model.livePositions().tolist(),
+                     comment='{} after {} generations'.format(args.pattern, args.generations))
+
+
+def writeProfile(args):
+    profiler.exportTrace(args.profile)
+    for name, values in sorted(profiler.summary()['stages'].items()):
+        print('{}: mean {:.3f} ms, max {:.3f} ms (last {} generations)'.format(
+            name, values['mean'], values['max'], values['n']))
+
+
+def main(argv=None):
+    args = parseArguments(argv)
+    if args.profile is not None:
+        profiler.enable()
+    # a missing or unreadable snapshot, or an output (or checkpoint, or trace) that can't be written, is reported
+    # like an invalid argument
+    try:
+        model = run(args)
+        if args.output is not None:
+            writeOutput(model, args)
+        if args.profile is not None:
+            writeProfile(args)
+    except (OSError, ValueError, PatternTooLargeError) as e:
+        print('Error: {}'.format(e), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
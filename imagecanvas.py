@@ -0,0 +1,151 @@
+import numpy as np
+
+from PyQt5.QtCore import Qt, QRect, QTimer
+from PyQt5.QtGui import QMouseEvent, QPainter, QPen, QImage, QPixmap, QColor
+from PyQt5.QtWidgets import QWidget
+
+from canvas import drawGridLines
+from life.profiler import profiler
+
+"""
+    ImageCanvasView is an alternative to CanvasView for big boards: instead of drawing a rectangle for every cell, the
+    state of the grid is written into a byte buffer (one byte per cell: 0 dead, 1 alive, 2 alive in the previous
+    generation, 3 dying with a Generations rule) that is shared with an indexed QImage, so that the whole board is
+    painted by scaling the image to the widget in a single blit. Grid lines are drawn only when the squares are large
+    enough to see them, and they are cached into a transparent pixmap which is blitted over the cells.
+    It has the same interface as the CanvasView, so that the Controller can use either of them.
+"""
+
+DEAD = 0
+ALIVE = 1
+OLD = 2
+DYING = 3
+# below this square edge (in pixels) the grid lines would cover the cells, so they are not drawn
+GRID_MIN_EDGE = 4
+
+
+class ImageCanvasView(QWidget):
+
+    def __init__(self, model):
+        super().__init__()
+
+        self.model = model
+        self.controller = None
+
+        self.history = False
+
+        # QImage rows must be aligned to 4 bytes, so the buffer can be a bit wider than the grid
+        stride = (self.model.numCols + 3) // 4 * 4
+        self.buffer = np.zeros((self.model.numRows, stride), dtype=np.uint8)
+        self.cells = self.buffer[:, :self.model.numCols]
+        # the current and previous generations, needed for the history
+        self.current = np.zeros((self.model.numRows, self.model.numCols), dtype=np.uint8)
+        self.previous = np.zeros((self.model.numRows, self.model.numCols), dtype=np.uint8)
+
+        # the image doesn't own its data: it reads straight from the buffer address, so the buffer must outlive it
+        self.image = QImage(self.buffer.ctypes.data, self.model.numCols, self.model.numRows, stride,
+                            QImage.Format_Indexed8)
+        self.image.setColorTable([QColor(Qt.white).rgb(), QColor(Qt.green).rgb(), QColor(Qt.red).rgb(),
+                                  QColor(Qt.darkGreen).rgb()])
+        self.gridPixmap = None
+
+        self.refreshPending = False
+
+    def addController(self, controller):
+        self.controller = controller
+
+    def setHistory(self):
+        self.history = not self.history
+        self.composeBuffer()
+        self.update()
+
+    def mousePressEvent(self, ev: QMouseEvent):
+        if self.controller is not None:
+            row = int(ev.pos().y() / self.model.squareEdge)
+            col = int(ev.pos().x() / self.model.squareEdge)
+            if row < self.model.numRows and col < self.model.numCols:
+                self.controller.updatePositions(row, col)
+
+    def drawGrid(self):
+        edge = self.model.squareEdge
+        if edge < GRID_MIN_EDGE:
+            self.gridPixmap = None
+            return
+        self.gridPixmap = QPixmap(edge * self.model.numCols + 1, edge * self.model.numRows + 1)
+        self.gridPixmap.fill(Qt.transparent)
+        painter = QPainter(self.gridPixmap)
+        painter.setPen(QPen(Qt.black))
+        drawGridLines(painter, edge, self.model.numRows, self.model.numCols)
+        painter.end()
+        self.update()
+
+    # single cells changes (mouse clicks, pattern loading) are collected and the buffer is refreshed only once
+    def drawRect(self, row, col, isNew):
+        self.scheduleRefresh()
+
+    def eraseRect(self, row, col):
+        self.scheduleRefresh()
+
+    def scheduleRefresh(self):
+        if not self.refreshPending:
+            self.refreshPending = True
+            QTimer.singleShot(0, self.refresh)
+
+    def refresh(self):
+        self.refreshPending = False
+        with self.model.lock:
+            self.model.grid.copyTo(self.current)
+        self.composeBuffer()
+        self.requestRepaint()
+
+    def requestRepaint(self):
+        self.update()
+        profiler.count('repaint requests')
+
+    def drawGeneration(self, previous, change):
+        # the generation that was on screen becomes the previous one
+        self.previous, self.current = self.current, self.previous
+        self.refresh()
+
+    def setShownCells(self, cells, oldCells):
+        np.copyto(self.current, cells)
+        np.copyto(self.previous, oldCells)
+        self.composeBuffer()
+        self.requestRepaint()
+
+    def endSnapshots(self):
+        with self.model.lock:
+            cells, oldCells = self.model.stateArrays()
+        self.setShownCells(cells, oldCells)
+
+    def drawSnapshot(self, cells):
+        self.previous, self.current = self.current, self.previous
+        np.copyto(self.current, cells)
+        self.composeBuffer()
+        self.requestRepaint()
+
+    def composeBuffer(self):
+        np.copyto(self.cells, self.current)
+        # the grid holds the dying states as 2, 3, ..., which all get the same colour
+        if self.model.rule.states > 2:
+            np.copyto(self.cells, DYING, where=self.current > ALIVE)
+        # just like the CanvasView, every cell of the previous generation is red, and only the born ones are green
+        if self.history:
+            np.copyto(self.cells, OLD, where=self.previous == ALIVE)
+
+    def clearAll(self):
+        self.current[:] = DEAD
+        self.previous[:] = DEAD
+        self.composeBuffer()
+        self.requestRepaint()
+
+    def paintEvent(self, ev):
+        start = profiler.start()
+        painter = QPainter(self)
+        edge = self.model.squareEdge
+        painter.drawImage(QRect(0, 0, edge * self.model.numCols, edge * self.model.numRows), self.image)
+        if self.gridPixmap is not None:
+            painter.drawPixmap(0, 0, self.gridPixmap)
+        painter.end()
+        profiler.stop('paint', start)
+        profiler.count('paint calls')
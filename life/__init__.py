@@ -0,0 +1,22 @@
+"""
+    The core of the game, which doesn't depend on Qt: the Model with its grids and stepping engines. It can be used
+    by the GUI (see MVC.py) as well as headless, e.g. by the command line runner in cli.py.
+"""
+
+from life.bitgrid import PackedGrid
+from life.chunkgrid import ChunkedGrid
+from life.engine import DenseGrid
+from life.hashlife import HashLife
+from life.library import PatternLibrary
+from life.model import Model, PatternTooLargeError, GRID_BACKENDS, STEPPING_MODES, TOPOLOGIES
+from life.patterns import readPattern, readPositions, writePattern
+from life.rules import Rule, RULES, parseRule
+from life.snapshot import Snapshot, readSnapshot, writeSnapshot
+
+
+# the parallel backend imports multiprocessing, so it's only imported when it's asked for
+def __getattr__(name):
+    if name == 'ParallelGrid':
+        from life.parallel import ParallelGrid
+        return ParallelGrid
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
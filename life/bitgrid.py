@@ -0,0 +1,295 @@
+import numpy as np
+
+from life.engine import noPositions, positionsArray
+from life.rules import CONWAY
+
+"""
+    A grid that packs 64 cells in each uint64 word, so that a cell costs a single bit instead of a byte (a 100k x 100k
+    grid fits in ~1.25 GB). Bit b of word w in a row is the cell in column 64 * w + b.
+    The step works on whole words: the eight neighbours of every cell are obtained by shifting the rows and words
+    around, then they are summed by a chain of boolean adders, so that 64 cells are updated by each bitwise operation.
+    A bit can only tell dead from alive, so the grid supports the two-state rules only. Conway's rule has its own
+    adder, which stops counting at four; any other rule needs the full count, and is applied by matching the count
+    against the birth and survival counts of the rule.
+"""
+
+WORD_BITS = 64
+ONE = np.uint64(1)
+LAST = np.uint64(WORD_BITS - 1)
+
+
+# the rows stepped at once by stepBands(): the temporaries only hold a band of rows (and the rows around it)
+BAND_ROWS = 256
+# the rows unpacked at once by unpackPositions()
+UNPACK_ROWS = 1024
+
+
+def shiftFromLeft(words, out, carry):
+    # every cell receives the value of its left neighbour (column - 1), carrying bits across word boundaries
+    np.right_shift(words[:, :-1], LAST, out=carry[:, 1:])
+    carry[:, 0] = 0
+    np.left_shift(words, ONE, out=out)
+    out |= carry
+
+
+def shiftFromRight(words, out, carry):
+    # every cell receives the value of its right neighbour (column + 1)
+    np.left_shift(words[:, 1:], LAST, out=carry[:, :-1])
+    carry[:, -1] = 0
+    np.right_shift(words, ONE, out=out)
+    out |= carry
+
+
+# on a torus of numCols columns, the first and the last columns are neighbours: their bits are carried around
+def wrapColumns(words, left, right, numCols):
+    lastBit = np.uint64((numCols - 1) % WORD_BITS)
+    left[:, 0] |= (words[:, -1] >> lastBit) & ONE
+    right[:, -1] |= (words[:, 0] & ONE) << lastBit
+
+
+"""
+    The step goes through the words a band of rows at a time, so that the temporaries (the shifted words and the
+    counters) take a band each instead of the whole grid, and they're allocated once for all the bands. Each band is
+    copied along with the rows above and below it, whose shifted words are the neighbours of its first and last rows:
+    the caller can then overwrite the band with the new generation before the next one is computed. On a torus the
+    rows above the first band and below the last one are the last and the first rows of the grid.
+"""
+
+
+# with wrapCols set, words is a whole torus of wrapCols columns. Gives back (start, stop, new words of the rows
+# [start, stop)), the latter being valid until the next band
+def stepBands(words, wrapCols=None, rule=CONWAY):
+    wrap = wrapCols is not None
+    numRows, numWords = words.shape
+    height = min(BAND_ROWS, numRows)
+    band = np.zeros((height + 2, numWords), dtype=np.uint64)
+    left = np.empty_like(band)
+    right = np.empty_like(band)
+    carry = np.empty_like(band)
+    counters = [np.empty((height, numWords), dtype=np.uint64) for _ in range(5)]
+    # the rows around the grid, saved before they're overwritten
+    above = words[-1].copy() if wrap else np.zeros(numWords, dtype=np.uint64)
+    below = words[0].copy() if wrap else np.zeros(numWords, dtype=np.uint64)
+
+    for start in range(0, numRows, height):
+        stop = min(start + height, numRows)
+        rows = stop - start
+        band[0] = above
+        band[1: rows + 1] = words[start: stop]
+        band[rows + 1] = words[stop] if stop < numRows else below
+        above = band[rows].copy()
+        current = band[: rows + 2]
+        shiftFromLeft(current, left[: rows + 2], carry[: rows + 2])
+        shiftFromRight(current, right[: rows + 2], carry[: rows + 2])
+        if wrap:
+            wrapColumns(current, left[: rows + 2], right[: rows + 2], wrapCols)
+        neighbours = [left[1: rows + 1], right[1: rows + 1],
+                      band[: rows], left[: rows], right[: rows],
+                      band[2: rows + 2], left[2: rows + 2], right[2: rows + 2]]
+        cells = band[1: rows + 1]
+        if rule != CONWAY:
+            yield start, stop, applyRuleWords(cells, neighbours, rule)
+        else:
+            yield start, stop, countConway(cells, neighbours, [c[: rows] for c in counters])
+
+
+def countConway(words, neighbours, counters):
+    # the neighbours are summed bit-wise by a saturating counter: s0 and s1 are the two low bits of the sum, while
+    # s2 is set as soon as the sum reaches four (and then it doesn't matter anymore, the cell is dead anyway)
+    s0, s1, s2, carry0, carry1 = counters
+    s0[:] = 0
+    s1[:] = 0
+    s2[:] = 0
+    for n in neighbours:
+        np.bitwise_and(s0, n, out=carry0)
+        s0 ^= n
+        np.bitwise_and(s1, carry0, out=carry1)
+        s1 ^= carry0
+        s2 |= carry1
+
+    # the game rules: exactly three neighbours, or two neighbours for a living cell
+    np.bitwise_or(s0, words, out=carry0)
+    carry0 &= s1
+    np.invert(s2, out=s2)
+    carry0 &= s2
+    return carry0
+
+
+def applyRuleWords(words, neighbours, rule):
+    # the neighbours are summed into four bit planes, enough for eight of them
+    bits = [np.zeros_like(words) for _ in range(4)]
+    for n in neighbours:
+        carry = n
+        for b in bits:
+            newCarry = b & carry
+            b ^= carry
+            carry = newCarry
+
+    # the cells whose count is exactly the given one
+    def countIs(count):
+        match = ~np.zeros_like(words)
+        for i, b in enumerate(bits):
+            match &= b if count >> i & 1 else ~b
+        return match
+
+    born = np.zeros_like(words)
+    survived = np.zeros_like(words)
+    for count in rule.birth:
+        born |= countIs(count)
+    for count in rule.survival:
+        survived |= countIs(count)
+    return (~words & born) | (words & survived)
+
+
+def unpackPositions(words, top, firstWord):
+    # turns the set bits of a words array into an array of (row, col) positions, a block of rows at a time so that
+    # the unpacked bits of a block are all that's held besides the positions
+    blocks = [unpackBlock(words[start: start + UNPACK_ROWS], top + start, firstWord)
+              for start in range(0, words.shape[0], UNPACK_ROWS)]
+    return np.concatenate(blocks or [noPositions()])
+
+
+def unpackBlock(words, top, firstWord):
+    numWords = words.shape[1]
+    setWords = np.flatnonzero(words)
+    if setWords.__len__() == 0:
+        return noPositions()
+    # the bits of the set words, one byte each (seen as booleans, which NumPy finds the set ones of much faster)
+    bytesView = words.reshape(-1)[setWords].astype('<u8').view(np.uint8)
+    bits = np.flatnonzero(np.unpackbits(bytesView, bitorder='little').view(bool))
+    wordIndex = setWords[bits >> 6]
+    return positionsArray(wordIndex // numWords + top, (wordIndex % numWords + firstWord) * WORD_BITS + (bits & 63))
+
+
+"""
+    The births and deaths of a step are given back as masks of words: most of the time only their number is needed
+    (e.g. to update the population), so the positions are only unpacked when someone asks for them (see
+    changePositions() in engine.py), e.g. the painter canvas or the history, which does it in the background.
+"""
+
+
+class PackedPositions:
+
+    def __init__(self, words, top, firstWord, count):
+        self.words = words
+        self.top = top
+        self.firstWord = firstWord
+        self.count = count
+        self.unpacked = None
+
+    def __len__(self):
+        return self.count
+
+    # the memory held by the mask (the history accounts for it until it's compressed)
+    @property
+    def nbytes(self):
+        return self.words.nbytes
+
+    def positions(self):
+        if self.unpacked is None:
+            self.unpacked = unpackPositions(self.words, self.top, self.firstWord)
+        return self.unpacked
+
+
+class PackedGrid:
+
+    def __init__(self, numRows, numCols):
+        self.numRows = numRows
+        self.numCols = numCols
+        self.numWords = (self.numCols + WORD_BITS - 1) // WORD_BITS
+        self.words = np.zeros((self.numRows, self.numWords), dtype=np.uint64)
+        self.rule = CONWAY
+
+    def setCell(self, row, col, value):
+        mask = ONE << np.uint64(col % WORD_BITS)
+        if value:
+            self.words[row, col // WORD_BITS] |= mask
+        else:
+            self.words[row, col // WORD_BITS] &= ~mask
+
+    def cellsAt(self, rows, cols):
+        shifts = (cols % WORD_BITS).astype(np.uint64)
+        return ((self.words[rows, cols // WORD_BITS] >> shifts) & ONE).astype(np.uint8)
+
+    def setCells(self, rows, cols, value):
+        # the ufunc.at variants are needed since many cells can belong to the same word
+        masks = ONE << (cols % WORD_BITS).astype(np.uint64)
+        if value:
+            np.bitwise_or.at(self.words, (rows, cols // WORD_BITS), masks)
+        else:
+            np.bitwise_and.at(self.words, (rows, cols // WORD_BITS), ~masks)
+
+    def clear(self):
+        self.words = np.zeros((self.numRows, self.numWords), dtype=np.uint64)
+
+    """
+        The sub grid is widened to whole words. This is safe because the cells between the sub grid and the word
+        boundaries have no living neighbours (the sub grid already contains a border of dead cells), and the padding
+        bits after the last column are never set, since they would only be born next to a living cell.
+        On a torus (wrap set) the sub grid must be the whole grid: the padding bits can then receive the cells of the
+        first column, so they're always cleared.
+    """
+
+    def step(self, top, left, bottom, right, wrap=False):
+        firstWord = left // WORD_BITS
+        lastWord = (right - 1) // WORD_BITS + 1
+        subGrid = self.words[top: bottom, firstWord: lastWord]
+        births = np.empty_like(subGrid)
+        deaths = np.empty_like(subGrid)
+        bornCount = 0
+        deadCount = 0
+        for start, stop, newBand in stepBands(subGrid, self.numCols if wrap else None, self.rule):
+            if self.numCols % WORD_BITS != 0 and lastWord == self.numWords:
+                # cells beyond the last column don't exist, so they can't be born
+                newBand[:, -1] &= (ONE << np.uint64(self.numCols % WORD_BITS)) - ONE
+            band = subGrid[start: stop]
+            np.bitwise_and(newBand, np.invert(band, out=births[start: stop]), out=births[start: stop])
+            np.bitwise_and(band, np.invert(newBand, out=deaths[start: stop]), out=deaths[start: stop])
+            bornCount += int(np.bitwise_count(births[start: stop]).sum(dtype=np.int64))
+            deadCount += int(np.bitwise_count(deaths[start: stop]).sum(dtype=np.int64))
+            band[:] = newBand
+        return PackedPositions(births, top, firstWord, bornCount), PackedPositions(deaths, top, firstWord, deadCount)
+
+    # the smallest rectangle inside [top, bottom) x [left, right) that contains all its living cells, or None: the rows
+    # are the ones with a word set, while the columns are found in the OR of those rows. The bits of the first and last
+    # words that fall outside the rectangle don't count
+    def bounds(self, top, left, bottom, right):
+        firstWord = left // WORD_BITS
+        lastWord = (right - 1) // WORD_BITS + 1
+        words = self.words[top: bottom, firstWord: lastWord]
+        firstMask = ~((ONE << np.uint64(left % WORD_BITS)) - ONE)
+        lastMask = (ONE << np.uint64(right % WORD_BITS)) - ONE if right % WORD_BITS != 0 else ~np.uint64(0)
+        if lastWord - firstWord == 1:
+            occupied = (words[:, 0] & (firstMask & lastMask)) != 0
+        else:
+            occupied = ((words[:, 0] & firstMask) != 0) | ((words[:, -1] & lastMask) != 0)
+            if lastWord - firstWord > 2:
+                occupied |= words[:, 1: -1].any(axis=1)
+        rows = np.flatnonzero(occupied)
+        if rows.__len__() == 0:
+            return None
+        columns = np.bitwise_or.reduce(words[rows[0]: rows[-1] + 1], axis=0)
+        columns[0] &= firstMask
+        columns[-1] &= lastMask
+        wordCols = np.flatnonzero(columns)
+        first = int(columns[wordCols[0]])
+        last = int(columns[wordCols[-1]])
+        return (top + int(rows[0]), (firstWord + int(wordCols[0])) * WORD_BITS + (first & -first).bit_length() - 1,
+                top + int(rows[-1]) + 1, (firstWord + int(wordCols[-1])) * WORD_BITS + last.bit_length())
+
+    def toArray(self):
+        bytesView = self.words.astype('<u8').view(np.uint8)
+        cells = np.unpackbits(bytesView, axis=1, bitorder='little')
+        return cells[:, :self.numCols]
+
+    # the cells of the rectangle [top, bottom) x [left, right), unpacking only the words that contain it
+    def window(self, top, left, bottom, right):
+        firstWord = left // WORD_BITS
+        lastWord = (right - 1) // WORD_BITS + 1
+        bytesView = self.words[top: bottom, firstWord: lastWord].astype('<u8').view(np.uint8)
+        cells = np.unpackbits(bytesView, axis=1, bitorder='little')
+        return cells[:, left - firstWord * WORD_BITS: right - firstWord * WORD_BITS]
+
+    def copyTo(self, out):
+        bytesView = self.words.astype('<u8').view(np.uint8)
+        np.copyto(out, np.unpackbits(bytesView, axis=1, bitorder='little')[:, :self.numCols])
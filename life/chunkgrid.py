@@ -0,0 +1,160 @@
+import numpy as np
+
+from life.engine import changedCells, noPositions, stepCells
+from life.rules import CONWAY
+
+"""
+    ChunkedGrid is the store of the infinite plane: the cells are split into square chunks of CHUNK_EDGE x CHUNK_EDGE
+    cells, kept in a dictionary by their (chunk row, chunk column) coordinates. A chunk is allocated only when a cell
+    in it becomes alive and it's dropped as soon as it's empty, so the memory follows the living cells wherever they
+    go (including negative positions) instead of the size of the window.
+    numRows and numCols are the size of the window: toArray() and copyTo() give back the cells inside it, which are
+    the only ones that can be drawn.
+"""
+
+CHUNK_EDGE = 64
+
+
+class ChunkedGrid:
+
+    def __init__(self, numRows, numCols):
+        self.numRows = numRows
+        self.numCols = numCols
+        self.chunks = {}
+        self.rule = CONWAY
+
+    def setCell(self, row, col, value):
+        self.setCells(np.array([row]), np.array([col]), value)
+
+    # calls function(chunkKey, indices) for each chunk touched by the given positions
+    def groupByChunk(self, rows, cols, function):
+        if rows.__len__() == 0:
+            return
+        keys = np.stack([rows // CHUNK_EDGE, cols // CHUNK_EDGE], axis=1)
+        uniqueKeys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        bounds = np.cumsum(np.bincount(inverse.ravel(), minlength=uniqueKeys.__len__()))
+        for key, indices in zip(uniqueKeys.tolist(), np.split(order, bounds[:-1])):
+            function((key[0], key[1]), indices)
+
+    def cellsAt(self, rows, cols):
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        values = np.zeros(rows.__len__(), dtype=np.uint8)
+
+        def read(key, indices):
+            chunk = self.chunks.get(key)
+            if chunk is not None:
+                values[indices] = chunk[rows[indices] % CHUNK_EDGE, cols[indices] % CHUNK_EDGE]
+
+        self.groupByChunk(rows, cols, read)
+        return values
+
+    def setCells(self, rows, cols, value):
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+
+        def write(key, indices):
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                if not value:
+                    return
+                chunk = self.chunks[key] = np.zeros((CHUNK_EDGE, CHUNK_EDGE), dtype=np.uint8)
+            chunk[rows[indices] % CHUNK_EDGE, cols[indices] % CHUNK_EDGE] = value
+            if not value and not chunk.any():
+                del self.chunks[key]
+
+        self.groupByChunk(rows, cols, write)
+
+    def clear(self):
+        self.chunks = {}
+
+    """
+        Each chunk is stepped on its own, together with the border of its eight neighbours. The chunks to step are
+        the allocated ones, plus the empty neighbours that face a living cell on the border of a chunk (where cells
+        can be born). The bounds given by the Model are ignored, since the plane has no bounding grid.
+    """
+
+    def stepCandidates(self):
+        candidates = set(self.chunks.keys())
+        for (cr, cc), chunk in self.chunks.items():
+            top = chunk[0].any()
+            bottom = chunk[-1].any()
+            left = chunk[:, 0].any()
+            right = chunk[:, -1].any()
+            for dr, dc, alive in ((-1, 0, top), (1, 0, bottom), (0, -1, left), (0, 1, right),
+                                  (-1, -1, chunk[0, 0]), (-1, 1, chunk[0, -1]),
+                                  (1, -1, chunk[-1, 0]), (1, 1, chunk[-1, -1])):
+                if alive:
+                    candidates.add((cr + dr, cc + dc))
+        return candidates
+
+    def paddedChunk(self, key):
+        # the chunk with a one-cell border taken from its neighbours
+        padded = np.zeros((CHUNK_EDGE + 2, CHUNK_EDGE + 2), dtype=np.uint8)
+        cr, cc = key
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                neighbour = self.chunks.get((cr + dr, cc + dc))
+                if neighbour is None:
+                    continue
+                # the part of the neighbour that falls into the padded chunk, and where it goes
+                source = [slice(-1, None), slice(None), slice(0, 1)]
+                target = [slice(0, 1), slice(1, -1), slice(-1, None)]
+                padded[target[dr + 1], target[dc + 1]] = neighbour[source[dr + 1], source[dc + 1]]
+        return padded
+
+    def step(self, top=None, left=None, bottom=None, right=None, wrap=False):
+        newChunks = {}
+        births = []
+        deaths = []
+        for key in self.stepCandidates():
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                chunk = np.zeros((CHUNK_EDGE, CHUNK_EDGE), dtype=np.uint8)
+            newChunk = stepCells(self.paddedChunk(key), rule=self.rule)[1: -1, 1: -1]
+            offset = (key[0] * CHUNK_EDGE, key[1] * CHUNK_EDGE)
+            born, dead = changedCells(chunk, newChunk, self.rule)
+            births.append(np.argwhere(born) + offset)
+            deaths.append(np.argwhere(dead) + offset)
+            if newChunk.any():
+                newChunks[key] = newChunk
+        self.chunks = newChunks
+        return np.concatenate(births or [noPositions()]), np.concatenate(deaths or [noPositions()])
+
+    # the positions of all the living cells, in the order of the rows and then of the columns
+    def positions(self):
+        positions = [np.argwhere(chunk) + (key[0] * CHUNK_EDGE, key[1] * CHUNK_EDGE)
+                     for key, chunk in self.chunks.items()]
+        positions = np.concatenate(positions or [noPositions()])
+        return positions[np.lexsort((positions[:, 1], positions[:, 0]))]
+
+    # the smallest rectangle (top, left, bottom, right) made of whole chunks that contains all the living cells, or
+    # None if there are none
+    def bounds(self):
+        if self.chunks.__len__() == 0:
+            return None
+        keys = np.array(list(self.chunks.keys()), dtype=np.int64)
+        top, left = keys.min(axis=0) * CHUNK_EDGE
+        bottom, right = (keys.max(axis=0) + 1) * CHUNK_EDGE
+        return int(top), int(left), int(bottom), int(right)
+
+    # the cells of the rectangle [top, bottom) x [left, right) of the plane
+    def window(self, top, left, bottom, right):
+        cells = np.zeros((bottom - top, right - left), dtype=np.uint8)
+        for (cr, cc), chunk in self.chunks.items():
+            rowStart = max(cr * CHUNK_EDGE, top)
+            rowEnd = min((cr + 1) * CHUNK_EDGE, bottom)
+            colStart = max(cc * CHUNK_EDGE, left)
+            colEnd = min((cc + 1) * CHUNK_EDGE, right)
+            if rowStart < rowEnd and colStart < colEnd:
+                cells[rowStart - top: rowEnd - top, colStart - left: colEnd - left] = \
+                    chunk[rowStart - cr * CHUNK_EDGE: rowEnd - cr * CHUNK_EDGE,
+                          colStart - cc * CHUNK_EDGE: colEnd - cc * CHUNK_EDGE]
+        return cells
+
+    def toArray(self):
+        return self.window(0, 0, self.numRows, self.numCols)
+
+    def copyTo(self, out):
+        np.copyto(out, self.window(0, 0, self.numRows, self.numCols))
@@ -0,0 +1,58 @@
+import numpy as np
+
+from collections import deque
+
+"""
+    Cycle detection. Every state of the board has a Zobrist hash: the XOR of a random 64 bit key for each living
+    cell, so that a change only costs the XOR of the keys of the born and dead cells. The keys are derived from the
+    cells positions by a mixing function (splitmix64) instead of being stored in a table, so they also work on the
+    infinite plane.
+    The CycleDetector remembers the hashes of the latest generations: as soon as a state shows up again, the game
+    is in a cycle whose period is the distance between the two generations (a still life is a cycle of period 1).
+    Since a state always evolves the same way, the first repetition also tells where the cycle started.
+"""
+
+MIX_1 = np.uint64(0xbf58476d1ce4e5b9)
+MIX_2 = np.uint64(0x94d049bb133111eb)
+GOLDEN = np.uint64(0x9e3779b97f4a7c15)
+ROW_KEY = np.uint64(0xd6e8feb86659fd93)
+
+
+def cellKeys(rows, cols):
+    with np.errstate(over='ignore'):
+        x = rows.astype(np.int64, copy=False).view(np.uint64) * ROW_KEY + \
+            cols.astype(np.int64, copy=False).view(np.uint64) + GOLDEN
+        x = (x ^ (x >> np.uint64(30))) * MIX_1
+        x = (x ^ (x >> np.uint64(27))) * MIX_2
+        return x ^ (x >> np.uint64(31))
+
+
+# the XOR of the keys of the given positions (an array of (row, col) pairs)
+def hashPositions(positions):
+    if positions.__len__() == 0:
+        return 0
+    positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+    return int(np.bitwise_xor.reduce(cellKeys(positions[:, 0], positions[:, 1])))
+
+
+class CycleDetector:
+
+    def __init__(self, maxPeriod=1000):
+        self.maxPeriod = maxPeriod
+        self.generations = {}
+        self.hashes = deque()
+
+    # records the hash of a generation and gives back (first generation of the cycle, period), or None
+    def observe(self, generation, stateHash):
+        if stateHash in self.generations:
+            start = self.generations[stateHash]
+            return start, generation - start
+        self.generations[stateHash] = generation
+        self.hashes.append(stateHash)
+        if self.hashes.__len__() > self.maxPeriod:
+            del self.generations[self.hashes.popleft()]
+        return None
+
+    def reset(self):
+        self.generations = {}
+        self.hashes.clear()
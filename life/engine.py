@@ -0,0 +1,213 @@
+import numpy as np
+
+from life.rules import CONWAY
+
+"""
+    The stepping engine works on the whole (sub) grid at once instead of visiting every cell: the neighbours count of
+    each cell is the sum of the eight shifted copies of a zero-padded grid, so a generation costs a handful of NumPy
+    array operations no matter how many cells there are. Cells outside the given array are considered dead, which is
+    the same behaviour of the finite grid of the game, unless wrap is set: then the array is a torus, and the cells
+    on each border are neighbours of the ones on the opposite border.
+    The rule (see rules.py) is applied by looking up the state of each cell and its neighbours count in the rule
+    table: only the living cells (state 1) are counted as neighbours, the dying states of the Generations rules are
+    not.
+"""
+
+
+def countNeighbours(cells, wrap=False):
+    rows, cols = cells.shape
+    padded = np.pad(cells, 1, mode='wrap' if wrap else 'constant')
+    counts = np.zeros((rows, cols), dtype=np.uint8)
+    for dr in range(3):
+        for dc in range(3):
+            if dr == 1 and dc == 1:
+                continue
+            counts += padded[dr: dr + rows, dc: dc + cols]
+    return counts
+
+
+def applyRules(cells, counts, rule=CONWAY):
+    # the index of each cell in the flattened rule table (it fits in a byte up to 28 states)
+    dtype = np.uint8 if rule.states <= 28 else np.uint16
+    index = cells.astype(dtype, copy=False) * dtype(9)
+    index += counts
+    if rule.states > 2:
+        return np.take(rule.table.ravel(), index)
+    # a cell is alive if its index falls in one of the runs of the table: once the first index of the run is
+    # subtracted, the indices below it wrap around, so a single comparison checks both ends of the run. The runs are
+    # in order, so the index is shifted in place from one run to the next
+    alive = np.zeros(cells.shape, dtype=bool)
+    shift = 0
+    for first, length in rule.runs:
+        index -= dtype(first - shift)
+        shift = first
+        alive |= index < length
+    return alive.view(np.uint8)
+
+
+def stepCells(cells, wrap=False, rule=CONWAY):
+    living = cells if rule.states == 2 else (cells == 1).view(np.uint8)
+    return applyRules(cells, countNeighbours(living, wrap), rule)
+
+
+"""
+    The cells that change are given around as arrays of positions, one (row, col) pair per row, so that a generation
+    never creates a Python object for each cell. Sets of positions are handled through their keys: a single integer
+    for each position (any position whose coordinates fit in 32 bits, so the plane works too), which NumPy can sort
+    and compare in bulk.
+"""
+
+
+def positionsArray(rows, cols):
+    return np.stack([np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)], axis=1)
+
+
+def noPositions():
+    return np.zeros((0, 2), dtype=np.int64)
+
+
+# the positions of a change given back by a grid step, which the packed grid only unpacks on request (see bitgrid.py)
+def changePositions(change):
+    if isinstance(change, np.ndarray):
+        return change
+    return change.positions()
+
+
+def positionKeys(positions):
+    return (positions[:, 0] << 32) + (positions[:, 1] + (1 << 31))
+
+
+def keysPositions(keys):
+    return positionsArray(keys >> 32, (keys & 0xffffffff) - (1 << 31))
+
+
+# the distinct values of an array, in order (np.unique hashes the values, which is much slower on large arrays)
+def uniqueValues(values):
+    values = np.sort(values)
+    return values[np.concatenate([values[:1] == values[:1], values[1:] != values[:-1]])]
+
+
+# the positions that are not among the others
+def positionsDifference(positions, others):
+    if positions.__len__() == 0 or others.__len__() == 0:
+        return positions
+    return positions[~np.isin(positionKeys(positions), positionKeys(others))]
+
+
+# the masks of the cells that appeared (dead -> any other state) and disappeared (any state -> dead) in a step
+def changedCells(cells, newCells, rule=CONWAY):
+    if rule.states == 2:
+        return newCells > cells, newCells < cells
+    return (cells == 0) & (newCells != 0), (cells != 0) & (newCells == 0)
+
+
+"""
+    Frontier stepping: a cell can change only if itself or one of its neighbours changed in the previous generation,
+    so instead of a whole sub grid it is enough to evaluate the cells that changed and their neighbourhoods. The
+    grid is accessed through cellsAt() and setCells(), which read and write lists of cells at once.
+    The topology tells what happens at the borders: on a 'bounded' grid the cells outside are dead, on a 'torus' the
+    positions wrap around, while on a 'plane' there are no borders at all (and the grid must accept any position).
+"""
+
+NEIGHBOURHOOD = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+
+
+# maps the positions according to the topology, and tells which ones exist
+def applyTopology(rows, cols, numRows, numCols, topology):
+    if topology == 'torus':
+        return rows % numRows, cols % numCols, np.ones(rows.__len__(), dtype=bool)
+    if topology == 'plane':
+        return rows, cols, np.ones(rows.__len__(), dtype=bool)
+    return rows, cols, (rows >= 0) & (rows < numRows) & (cols >= 0) & (cols < numCols)
+
+
+def frontierCandidates(positions, numRows, numCols, topology='bounded'):
+    pos = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+    offsets = np.array(NEIGHBOURHOOD, dtype=np.int64)
+    rows = (pos[:, 0, None] + offsets[:, 0]).ravel()
+    cols = (pos[:, 1, None] + offsets[:, 1]).ravel()
+    rows, cols, inside = applyTopology(rows, cols, numRows, numCols, topology)
+    if topology == 'plane':
+        # the positions can be anywhere, so they can't be turned into flat indices of the grid
+        candidates = keysPositions(uniqueValues(positionKeys(positionsArray(rows, cols))))
+        return candidates[:, 0], candidates[:, 1]
+    flat = uniqueValues(rows[inside] * numCols + cols[inside])
+    return flat // numCols, flat % numCols
+
+
+def stepPositions(grid, positions, topology='bounded', rule=CONWAY):
+    rows, cols = frontierCandidates(positions, grid.numRows, grid.numCols, topology)
+    cells = grid.cellsAt(rows, cols)
+    counts = np.zeros(rows.__len__(), dtype=np.uint8)
+    for dr, dc in NEIGHBOURHOOD:
+        if dr == 0 and dc == 0:
+            continue
+        r, c, inside = applyTopology(rows + dr, cols + dc, grid.numRows, grid.numCols, topology)
+        counts[inside] += grid.cellsAt(r[inside], c[inside])
+    newCells = applyRules(cells, counts, rule)
+
+    # the whole generation is computed before writing it, since all the cells are updated at the same time
+    born, dead = changedCells(cells, newCells, rule)
+    grid.setCells(rows[born], cols[born], 1)
+    grid.setCells(rows[dead], cols[dead], 0)
+    return positionsArray(rows[born], cols[born]), positionsArray(rows[dead], cols[dead])
+
+
+"""
+    The grid classes store the state of the cells and step it: the Model only talks to them through setCell(),
+    cellsAt(), setCells(), clear(), step(), toArray(), window() and copyTo(), so different representations of the
+    same grid can be swapped when the Model is constructed. DenseGrid is the simplest one, with a byte for each cell.
+    The rule used by step() is the rule attribute of the grid, which the Model sets.
+"""
+
+
+class DenseGrid:
+
+    def __init__(self, numRows, numCols):
+        self.numRows = numRows
+        self.numCols = numCols
+        self.cells = np.zeros((self.numRows, self.numCols), dtype=np.uint8)
+        self.rule = CONWAY
+
+    def setCell(self, row, col, value):
+        self.cells[row, col] = value
+
+    def cellsAt(self, rows, cols):
+        return self.cells[rows, cols]
+
+    def setCells(self, rows, cols, value):
+        self.cells[rows, cols] = value
+
+    def clear(self):
+        self.cells = np.zeros((self.numRows, self.numCols), dtype=np.uint8)
+
+    # steps the sub grid [top, bottom) x [left, right) and returns the arrays of born and dead cells positions. With
+    # wrap set, the grid is a torus and the sub grid must be the whole grid
+    def step(self, top, left, bottom, right, wrap=False):
+        subGrid = self.cells[top: bottom, left: right]
+        newSubGrid = stepCells(subGrid, wrap, self.rule)
+        born, dead = changedCells(subGrid, newSubGrid, self.rule)
+        births = np.argwhere(born) + (top, left)
+        deaths = np.argwhere(dead) + (top, left)
+        self.cells[top: bottom, left: right] = newSubGrid
+        return births, deaths
+
+    # the smallest rectangle inside [top, bottom) x [left, right) that contains all its living cells, or None
+    def bounds(self, top, left, bottom, right):
+        subGrid = self.cells[top: bottom, left: right]
+        rows = np.flatnonzero(subGrid.any(axis=1))
+        if rows.__len__() == 0:
+            return None
+        cols = np.flatnonzero(subGrid[rows[0]: rows[-1] + 1].any(axis=0))
+        return top + int(rows[0]), left + int(cols[0]), top + int(rows[-1]) + 1, left + int(cols[-1]) + 1
+
+    def toArray(self):
+        return self.cells.copy()
+
+    # the cells of the rectangle [top, bottom) x [left, right)
+    def window(self, top, left, bottom, right):
+        return self.cells[top: bottom, left: right].copy()
+
+    # writes the cells into an existing (numRows, numCols) array, without allocating a new one
+    def copyTo(self, out):
+        np.copyto(out, self.cells)
@@ -0,0 +1,267 @@
+from life.rules import CONWAY
+
+"""
+    HashLife engine (Gosper's algorithm). The plane is described by a quadtree whose nodes are canonical: two squares
+    with the same content are the same Node object, so a pattern with a lot of repetitions (in space or in time) is
+    stored only once. Every node of level k (a 2^k x 2^k square) memoizes its successor, which is its central
+    2^(k-1) x 2^(k-1) square advanced by 2^j generations (with j <= k - 2). Since both space and time are compressed,
+    a pattern can be advanced by millions of generations in the time needed to compute a few hundred of them.
+    Unlike the finite grid of the Model, the plane is unbounded: cells are never clipped while advancing.
+    The memoized results depend on the rule, so an engine only works with the (two-state) rule it was created with.
+"""
+
+
+class Node:
+
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population', 'results')
+
+    def __init__(self, nw, ne, sw, se, level, population):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+        # successors memo, indexed by j (the node is advanced by 2^j generations)
+        self.results = None
+
+
+# the two level 0 nodes: a dead and a living cell
+OFF = Node(None, None, None, None, 0, 0)
+ON = Node(None, None, None, None, 0, 1)
+
+
+# raised by successor() when the table outgrows maxNodes in the middle of an advancement
+class NodeLimitReached(Exception):
+    pass
+
+
+class HashLife:
+
+    def __init__(self, maxNodes=1000000, rule=CONWAY):
+        # when the canonical nodes are more than maxNodes, the ones that can't be reached from the root are thrown
+        # away together with all the memoized results (see collect())
+        self.maxNodes = maxNodes
+        if rule.states != 2:
+            raise ValueError('HashLife only supports two-state rules')
+        self.rule = rule
+        self.table = {}
+        # true while an advancement must stop as soon as the table is full
+        self.limited = False
+        self.empties = [OFF]
+        self.root = self.empty(3)
+        # position of the root top-left corner on the plane, and number of generations computed so far
+        self.originRow = 0
+        self.originCol = 0
+        self.generation = 0
+
+    def join(self, nw, ne, sw, se):
+        key = (nw, ne, sw, se)
+        node = self.table.get(key)
+        if node is None:
+            node = Node(nw, ne, sw, se, nw.level + 1,
+                        nw.population + ne.population + sw.population + se.population)
+            self.table[key] = node
+        return node
+
+    def empty(self, level):
+        while self.empties.__len__() <= level:
+            e = self.empties[-1]
+            self.empties.append(self.join(e, e, e, e))
+        return self.empties[level]
+
+    def centre(self, node):
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def setCells(self, positions):
+        # builds the quadtree bottom-up: at each level, the nodes are grouped four by four into their parents
+        positions = list(positions)
+        self.generation = 0
+        if positions.__len__() == 0:
+            self.root = self.empty(3)
+            self.originRow = 0
+            self.originCol = 0
+            return
+        self.originRow = min(p[0] for p in positions)
+        self.originCol = min(p[1] for p in positions)
+        side = max(max(p[0] for p in positions) - self.originRow, max(p[1] for p in positions) - self.originCol) + 1
+        level = max(3, (side - 1).bit_length())
+
+        nodes = {(p[0] - self.originRow, p[1] - self.originCol): ON for p in positions}
+        for lvl in range(level):
+            e = self.empty(lvl)
+            parents = {}
+            for (r, c) in nodes:
+                parent = (r >> 1, c >> 1)
+                if parent not in parents:
+                    pr = parent[0] << 1
+                    pc = parent[1] << 1
+                    parents[parent] = self.join(nodes.get((pr, pc), e), nodes.get((pr, pc + 1), e),
+                                                nodes.get((pr + 1, pc), e), nodes.get((pr + 1, pc + 1), e))
+            nodes = parents
+        self.root = nodes[(0, 0)]
+
+    def cells(self):
+        positions = []
+        stack = [(self.root, self.originRow, self.originCol)]
+        while stack:
+            node, row, col = stack.pop()
+            if node.population == 0:
+                continue
+            if node.level == 0:
+                positions.append((row, col))
+                continue
+            half = 1 << (node.level - 1)
+            stack.append((node.nw, row, col))
+            stack.append((node.ne, row, col + half))
+            stack.append((node.sw, row + half, col))
+            stack.append((node.se, row + half, col + half))
+        return positions
+
+    def population(self):
+        return self.root.population
+
+    """
+        Base case: the central 2x2 square of a 4x4 node after one generation, computed by brute force with the rule
+        table.
+    """
+
+    def life4x4(self, node):
+        grid = [[node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+                [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+                [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+                [node.sw.sw, node.sw.se, node.se.sw, node.se.se]]
+        newCells = []
+        for r in (1, 2):
+            for c in (1, 2):
+                numNeighs = sum(grid[r + dr][c + dc].population
+                                for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr != 0 or dc != 0)
+                newCells.append(ON if self.rule.table[grid[r][c].population, numNeighs] else OFF)
+        return self.join(*newCells)
+
+    """
+        The node is split into nine overlapping sub-nodes of level k-1. When advancing by the maximum amount of
+        generations (j = k - 2), each one of them is advanced by 2^(j-1) generations, then they are combined into four
+        nodes that are advanced again by 2^(j-1) generations. For smaller steps the first advancement is skipped and
+        only the centres of the sub-nodes are taken.
+    """
+
+    def successor(self, node, j):
+        if node.population == 0:
+            return self.empty(node.level - 1)
+        if node.results is not None and j in node.results:
+            return node.results[j]
+        if self.limited and self.table.__len__() > self.maxNodes:
+            raise NodeLimitReached
+
+        if node.level == 2:
+            result = self.life4x4(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            subNodes = [nw, self.join(nw.ne, ne.nw, nw.se, ne.sw), ne,
+                        self.join(nw.sw, nw.se, sw.nw, sw.ne), self.join(nw.se, ne.sw, sw.ne, se.nw),
+                        self.join(ne.sw, ne.se, se.nw, se.ne),
+                        sw, self.join(sw.ne, se.nw, sw.se, se.sw), se]
+            if j == node.level - 2:
+                r = [self.successor(n, j - 1) for n in subNodes]
+                nextJ = j - 1
+            else:
+                r = [self.centre(n) for n in subNodes]
+                nextJ = j
+            result = self.join(self.successor(self.join(r[0], r[1], r[3], r[4]), nextJ),
+                               self.successor(self.join(r[1], r[2], r[4], r[5]), nextJ),
+                               self.successor(self.join(r[3], r[4], r[6], r[7]), nextJ),
+                               self.successor(self.join(r[4], r[5], r[7], r[8]), nextJ))
+
+        if node.results is None:
+            node.results = {}
+        node.results[j] = result
+        return result
+
+    # the root is surrounded by empty space, keeping its content in the centre
+    def expand(self):
+        root = self.root
+        e = self.empty(root.level - 1)
+        self.root = self.join(self.join(e, e, e, root.nw), self.join(e, e, root.ne, e),
+                              self.join(e, root.sw, e, e), self.join(root.se, e, e, e))
+        half = 1 << (root.level - 1)
+        self.originRow -= half
+        self.originCol -= half
+
+    # the opposite of expand(): the root is replaced by its centre as long as nothing is lost
+    def shrink(self):
+        while self.root.level > 3 and self.centre(self.root).population == self.root.population:
+            quarter = 1 << (self.root.level - 2)
+            self.root = self.centre(self.root)
+            self.originRow += quarter
+            self.originCol += quarter
+
+    # true if the living cells are all in the central square of side 2^(k-2)
+    def isPadded(self):
+        root = self.root
+        return root.nw.se.se.population + root.ne.sw.sw.population + root.sw.ne.ne.population + \
+            root.se.nw.nw.population == root.population
+
+    """
+        Any number of generations is the sum of powers of two, so the root is advanced by 2^j generations for each
+        bit set in the binary representation of the number. Before each advancement the root is expanded until the
+        pattern is far enough from the borders: the successor covers the central half of the root, and in 2^j
+        generations nothing can move further than 2^j cells.
+        The nodes can't be collected in the middle of an advancement (the recursion holds the ones it's combining), so
+        when the table fills up the advancement is given up, the table is collected, and the 2^j generations are
+        done as two advancements of 2^(j-1), which need fewer nodes each. A single generation is never split: if it
+        doesn't fit, the pattern itself is too large for maxNodes.
+    """
+
+    def advance(self, generations):
+        j = 0
+        while generations > 0:
+            if generations & 1:
+                self.advancePower(j)
+            generations >>= 1
+            j += 1
+
+    def advancePower(self, j):
+        while self.root.level < j + 3 or not self.isPadded():
+            self.expand()
+        self.collect()
+        self.limited = j > 0
+        try:
+            root = self.successor(self.root, j)
+        except NodeLimitReached:
+            self.collect()
+            self.advancePower(j - 1)
+            self.advancePower(j - 1)
+            return
+        finally:
+            self.limited = False
+        quarter = 1 << (self.root.level - 2)
+        self.root = root
+        self.originRow += quarter
+        self.originCol += quarter
+        self.generation += 1 << j
+        self.shrink()
+        self.collect()
+
+    """
+        Garbage collection of the canonical nodes: when the table is larger than maxNodes, only the nodes reachable
+        from the root (and the empty nodes) are kept, and the memoized results are dropped, since they are the
+        references that keep unreachable nodes alive.
+    """
+
+    def collect(self):
+        if self.table.__len__() <= self.maxNodes:
+            return
+        table = {}
+        stack = [self.root] + self.empties
+        while stack:
+            node = stack.pop()
+            if node.level == 0:
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key in table:
+                continue
+            table[key] = node
+            node.results = None
+            stack.extend(key)
+        self.table = table
@@ -0,0 +1,183 @@
+import threading
+import zlib
+import numpy as np
+
+from collections import deque
+
+from life.engine import changePositions, positionKeys
+
+"""
+    The History keeps the changes of the last generations, so that the board can be rewound without computing it
+    again from the start. Each change is stored as the diff between two states (the born and the dead cells) along
+    with the generation it started from: rewinding means applying a diff backwards, so it only costs as much as the
+    cells that changed.
+    The diffs are compressed: the positions are sorted, delta-encoded (so that most of the numbers are small) and
+    zlib-compressed. They're kept in a ring buffer bounded both by the number of entries and by their total size:
+    when one of the limits is exceeded, the oldest entries are dropped. The entries that have been rewound are kept
+    aside, so that the board can also be moved forward again without recomputing it.
+    Compressing a large diff takes longer than computing the generation, so it isn't done while stepping: a change is
+    recorded as the arrays given by the grid, and a background thread (which only runs while there are changes to
+    compress) replaces them with the compressed data later on. Until then an entry counts for the size of its arrays,
+    so the memory stays bounded even when the compression falls behind.
+"""
+
+
+def encodePositions(positions):
+    positions = np.array(positions, dtype=np.int64).reshape(-1, 2)
+    # the grids mostly give back the positions already in order
+    keys = positionKeys(positions)
+    if (keys[1:] < keys[:-1]).any():
+        positions = positions[np.argsort(keys, kind='stable')]
+    deltas = np.diff(positions, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    return zlib.compress(deltas.astype('<i8').tobytes(), 1)
+
+
+def decodePositions(data):
+    deltas = np.frombuffer(zlib.decompress(data), dtype='<i8').reshape(-1, 2)
+    return np.cumsum(deltas, axis=0)
+
+
+# the positions of an entry, whether they have been compressed yet or not
+def entryPositions(data):
+    if isinstance(data, bytes):
+        return decodePositions(data)
+    return changePositions(data)
+
+
+def dataSize(data):
+    if isinstance(data, bytes):
+        return data.__len__()
+    return data.nbytes
+
+
+class HistoryEntry:
+
+    __slots__ = ('generation', 'births', 'deaths', 'stored')
+
+    def __init__(self, generation, births, deaths):
+        self.generation = generation
+        self.births = births
+        self.deaths = deaths
+        # whether the entry is among the past ones, which are the only ones that count for the size
+        self.stored = True
+
+
+class History:
+
+    def __init__(self, maxEntries=1000, maxBytes=64 * 2 ** 20):
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        # the past entries are in order, while the rewound ones are a stack (the last one is the next to be applied
+        # again), each along with the generation it leads to
+        self.past = deque()
+        self.future = []
+        self.size = 0
+        # the number of past and rewound entries, as a single value that the GUI can read while another thread is
+        # changing the history (see MVC.py)
+        self.range = (0, 0)
+        # the entries waiting to be compressed, and the thread compressing them (None when there are none). The lock
+        # guards them and the size, which both threads change
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.encoder = None
+
+    def record(self, generation, births, deaths):
+        # a new change makes the rewound ones meaningless
+        self.dropFuture()
+        if self.maxEntries == 0:
+            return
+        entry = HistoryEntry(generation, births, deaths)
+        with self.lock:
+            self.past.append(entry)
+            self.size += self.entrySize(entry)
+            while self.past.__len__() > self.maxEntries or (self.size > self.maxBytes and self.past.__len__() > 1):
+                dropped = self.past.popleft()
+                dropped.stored = False
+                self.size -= self.entrySize(dropped)
+            self.schedule(entry)
+        self.updateRange()
+
+    def entrySize(self, entry):
+        return dataSize(entry.births) + dataSize(entry.deaths)
+
+    # queues an entry for the compression, starting the thread if it isn't running. Must hold the lock
+    def schedule(self, entry):
+        self.pending.append(entry)
+        if self.encoder is None:
+            self.encoder = threading.Thread(target=self.encode, daemon=True)
+            self.encoder.start()
+
+    def encode(self):
+        while True:
+            with self.lock:
+                if self.pending.__len__() == 0:
+                    self.encoder = None
+                    return
+                entry = self.pending.popleft()
+                # the dropped and rewound entries aren't worth it (a rewound one is queued again if it's applied)
+                if not entry.stored or isinstance(entry.births, bytes):
+                    continue
+                births, deaths = entry.births, entry.deaths
+            encoded = encodePositions(changePositions(births)), encodePositions(changePositions(deaths))
+            with self.lock:
+                if entry.stored:
+                    self.size -= self.entrySize(entry)
+                entry.births, entry.deaths = encoded
+                if entry.stored:
+                    self.size += self.entrySize(entry)
+
+    # takes back the latest change, which leads to the given generation: (generation, births, deaths) as arrays
+    def undo(self, currentGeneration):
+        with self.lock:
+            entry = self.past.pop()
+            entry.stored = False
+            self.size -= self.entrySize(entry)
+        self.future.append((entry, currentGeneration))
+        self.updateRange()
+        return entry.generation, entryPositions(entry.births), entryPositions(entry.deaths)
+
+    # applies again the latest rewound change: (generation it leads to, births, deaths)
+    def redo(self):
+        entry, nextGeneration = self.future.pop()
+        with self.lock:
+            self.past.append(entry)
+            entry.stored = True
+            self.size += self.entrySize(entry)
+            if not isinstance(entry.births, bytes):
+                self.schedule(entry)
+        self.updateRange()
+        return nextGeneration, entryPositions(entry.births), entryPositions(entry.deaths)
+
+    # the births and deaths of the latest change, or None if there isn't one
+    def lastChange(self):
+        return self.recentChange(1)
+
+    # the births and deaths of the change that is the given number of changes back, or None if it has been dropped
+    def recentChange(self, back):
+        if self.past.__len__() < back:
+            return None
+        entry = self.past[-back]
+        return entryPositions(entry.births), entryPositions(entry.deaths)
+
+    def dropFuture(self):
+        self.future = []
+        self.updateRange()
+
+    def clear(self):
+        with self.lock:
+            for entry in self.past:
+                entry.stored = False
+            self.past.clear()
+            self.pending.clear()
+            self.size = 0
+        self.future = []
+        self.updateRange()
+
+    def updateRange(self):
+        self.range = (self.past.__len__(), self.future.__len__())
+
+    def canUndo(self):
+        return self.past.__len__() != 0
+
+    def canRedo(self):
+        return self.future.__len__() != 0
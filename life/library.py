@@ -0,0 +1,90 @@
+import json
+import os
+
+from life.patterns import PATTERN_EXTENSIONS, patternToPositions, readPositions, readRLEHeader
+
+"""
+    The PatternLibrary is the index of the known patterns: the ones in patterns.json plus the pattern files found in
+    the patterns directory. Building the index only reads the names and, where the format tells them in the header,
+    the sizes of the patterns: the cells of a pattern are read when it's loaded, so that a library with thousands of
+    (possibly huge) patterns opens instantly. The index itself is only built the first time it's needed, so creating
+    a Model (e.g. while the window is starting) doesn't touch the files at all.
+    Each entry of the index is a dictionary with the 'name', the 'rows' and 'cols' of the pattern (None if unknown
+    before reading it), the 'position' where it's drawn (None to centre it) and the 'path' of its file (None for the
+    patterns of patterns.json).
+"""
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the patterns shipped with the game, found next to the life package whatever the working directory is
+PATTERNS_FILE = os.path.join(ROOT_DIR, 'patterns.json')
+PATTERNS_DIR = os.path.join(ROOT_DIR, 'patterns')
+
+
+class PatternLibrary:
+
+    def __init__(self, patternsFile=PATTERNS_FILE, patternsDir=PATTERNS_DIR):
+        self.patternsFile = patternsFile
+        self.patternsDir = patternsDir
+        self.indexedEntries = None
+        self.indexedNames = None
+        self.jsonData = {}
+
+    @property
+    def entries(self):
+        if self.indexedEntries is None:
+            self.index()
+        return self.indexedEntries
+
+    @property
+    def names(self):
+        if self.indexedNames is None:
+            self.index()
+        return self.indexedNames
+
+    def index(self):
+        self.indexedEntries = []
+        if self.patternsFile is not None:
+            self.indexJSON(self.patternsFile)
+        if self.patternsDir is not None and os.path.isdir(self.patternsDir):
+            self.indexDirectory(self.patternsDir)
+        self.indexedNames = [e['name'] for e in self.indexedEntries]
+
+    def indexJSON(self, patternsFile):
+        with open(patternsFile, 'r') as f:
+            self.jsonData = json.load(f)
+        for name, data in self.jsonData.items():
+            pattern = data['pattern']
+            self.indexedEntries.append({'name': name, 'rows': pattern.__len__(),
+                                        'cols': max([r.__len__() for r in pattern], default=0),
+                                        'position': data['position'], 'path': None})
+
+    def indexDirectory(self, patternsDir):
+        for fileName in sorted(os.listdir(patternsDir)):
+            name, extension = os.path.splitext(fileName)
+            if extension.lower() not in PATTERN_EXTENSIONS:
+                continue
+            path = os.path.join(patternsDir, fileName)
+            rows = None
+            cols = None
+            if extension.lower() == '.rle':
+                try:
+                    rleName, rows, cols = readRLEHeader(path)
+                except (OSError, ValueError):
+                    # a broken file doesn't prevent the others from being used
+                    continue
+                name = rleName or name
+            self.indexedEntries.append({'name': name, 'rows': rows, 'cols': cols, 'position': None, 'path': path})
+
+    # the text shown for a pattern, with its size when it's known
+    def label(self, index):
+        entry = self.entries[index]
+        if entry['rows'] is None or entry['rows'] == 0:
+            return entry['name']
+        return '{} ({}x{})'.format(entry['name'], entry['cols'], entry['rows'])
+
+    # the cells of a pattern, as an array of (row, col) positions relative to its top-left corner
+    def load(self, index):
+        entry = self.entries[index]
+        if entry['path'] is None:
+            return patternToPositions(self.jsonData[entry['name']]['pattern'])
+        return readPositions(entry['path'])
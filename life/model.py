@@ -0,0 +1,562 @@
+import threading
+import numpy as np
+
+from life.bitgrid import PackedGrid
+from life.chunkgrid import ChunkedGrid
+from life.engine import DenseGrid, changePositions, noPositions, positionsArray, positionsDifference, stepPositions
+from life.cycles import CycleDetector, hashPositions
+from life.hashlife import HashLife
+from life.history import History
+from life.library import PatternLibrary, PATTERNS_FILE, PATTERNS_DIR
+from life.patterns import patternToPositions
+from life.rules import CONWAY, parseRule
+from life.snapshot import BLOCK_ROWS
+
+"""
+    The Model of the MVC implementation is used to retain the useful data (it should be linked to a DB or something
+    like that, but since there are a few data I didn't want to overkill it) and to dispatch them to the various 
+    views via the Controller. Also, I've decided to send the updated data as return value of the model methods (where
+    possible), since it is faster than using specific function calls like getters and setters and this way you still
+    don't access directly the stored data, therefore not violating the MVC principle.
+    The Model doesn't depend on Qt, so that it can also be used without the GUI (see cli.py): errors are raised as
+    exceptions and it's up to the Controller to show them to the user.
+"""
+
+
+# multiprocessing takes a while to import, so the parallel backend is only imported when it's chosen
+def createParallelGrid(numRows, numCols):
+    from life.parallel import ParallelGrid
+    return ParallelGrid(numRows, numCols)
+
+
+# the cells representations that can be chosen when constructing the Model: 'dense' uses a byte for each cell,
+# 'packed' uses a single bit (see bitgrid.py) and is meant for very large grids, while 'parallel' is a dense grid in
+# shared memory stepped by a pool of processes (see parallel.py)
+GRID_BACKENDS = {'dense': DenseGrid, 'packed': PackedGrid, 'parallel': createParallelGrid}
+# the ways of computing a generation: 'box' evaluates every cell in the bounding box of the living cells, while
+# 'frontier' only evaluates the cells that changed in the previous generation and their neighbours
+STEPPING_MODES = ['box', 'frontier']
+# what happens at the borders of the window: on a 'bounded' grid the cells outside are always dead, on a 'torus' the
+# opposite borders are neighbours, while the 'plane' is infinite (see chunkgrid.py) and the window only shows a part
+# of it
+TOPOLOGIES = ['bounded', 'torus', 'plane']
+
+
+class Model:
+
+    def __init__(self, squareEdge, pixmapWidth, pixmapHeight, backend='dense', stepping='box', topology='bounded',
+                 patternsFile=PATTERNS_FILE, patternsDir=PATTERNS_DIR, historySize=1000, historyBytes=64 * 2 ** 20,
+                 maxPeriod=1000, rule=CONWAY, detectCycles=True):
+
+        # state initialization
+        self.squareEdge = squareEdge
+        # the Model can be stepped by a background thread (see life/worker.py) while the GUI changes it, so every
+        # access from the Controller goes through this lock
+        self.lock = threading.RLock()
+        self.pixmapWidth = pixmapWidth
+        self.pixmapHeight = pixmapHeight
+        self.numRows = int(self.pixmapHeight / self.squareEdge)
+        self.numCols = int(self.pixmapWidth / self.squareEdge)
+        # the number of cells on the board (the living ones and, with a Generations rule, the dying ones): the cells
+        # themselves are only kept by the grid
+        self.population = 0
+        if backend not in GRID_BACKENDS:
+            raise ValueError('Unknown grid backend: {}'.format(backend))
+        if topology not in TOPOLOGIES:
+            raise ValueError('Unknown topology: {}'.format(topology))
+        self.topology = topology
+        if self.topology == 'plane' and backend != 'dense':
+            raise ValueError('The {} backend cannot be used on the plane'.format(backend))
+        # the grid is only allocated when it's first used (see the grid property), so that a large board doesn't
+        # delay the first painting of the window
+        self.backend = backend
+        self.allocatedGrid = None
+        # the arrays of the cells changed since the last generation, used by the 'frontier' stepping
+        self.frontier = []
+        self.stepping = 'box'
+        self.setStepping(stepping)
+        # the change (births, deaths) from the previous state given to the views to the current one: the views that
+        # show the previous generation draw it from here
+        self.lastChange = (noPositions(), noPositions())
+        # the number of generations computed since the grid was cleared (or the one of the loaded snapshot)
+        self.generation = 0
+        # the changes of the last historySize generations (and edits), using at most historyBytes of memory
+        self.history = History(historySize, historyBytes)
+        # the Zobrist hash of the board (see cycles.py) and the cycle the game is in, as (first generation, period),
+        # or None if no cycle up to maxPeriod generations long has been found yet. Hashing every change has a cost,
+        # so it can be turned off when nobody looks for cycles: the cycle is then always None, which also means that
+        # the generations of a cycle are computed instead of replayed, and that jumps aren't shortened
+        self.detectCycles = detectCycles
+        self.stateHash = 0
+        self.cycles = CycleDetector(maxPeriod)
+        self.cycle = None
+        self.resetCycle()
+        # the HashLife engine used to jump many generations ahead, created on the first jump
+        self.hashLife = None
+        # the rule of the game (see rules.py), which can be changed at any time
+        self.rule = CONWAY
+        self.setRule(rule)
+        # the index of the known patterns is built when it's first needed, and their cells when they're loaded
+        self.library = PatternLibrary(patternsFile, patternsDir)
+
+        # no need to pass the following attributes
+        self.minX = 0
+        self.minY = 0
+        self.maxX = 0
+        self.maxY = 0
+        self.looseBounds = False
+
+    """ 
+        These methods provide a way to compute the smallest grid that contains dots of interest: since a dead cell
+        can become alive iff there are alive cells in its neighborhood, there's no point in computing values for
+        dead cells that are not close to living cells. Hence, by updating the (x, y) positions of both the 
+        closest and the farthest cell wrt to the top-left corner, you can find a sub grid with all the interesting 
+        cells and also save quite a lot of computations (even if it's not the minimum number).
+        The bounds are found by the grid itself, which looks for the living cells in the sub grid it has just
+        computed (a packed grid does it a word at a time): that's much cheaper than the generation, and it doesn't
+        need anything else than the grid. The other changes can only widen the box with the born cells, while the
+        dead ones make it loose: it still contains all the cells, and the grid shrinks it again when it's needed.
+        On the plane the cells can be anywhere, so there is no bounding box: the ChunkedGrid keeps track of the
+        regions to compute by itself.
+    """
+
+    def setBounds(self, bounds):
+        if bounds is None:
+            bounds = (0, 0, 1, 1)
+        self.minX, self.minY = bounds[0], bounds[1]
+        self.maxX, self.maxY = bounds[2] - 1, bounds[3] - 1
+        self.looseBounds = False
+
+    def widenBounds(self, births, deaths, wasEmpty):
+        if self.population == 0:
+            self.setBounds(None)
+            return
+        if births.__len__() != 0:
+            top, left = (int(x) for x in births.min(axis=0))
+            bottom, right = (int(x) + 1 for x in births.max(axis=0))
+            if not wasEmpty:
+                top, left = min(top, self.minX), min(left, self.minY)
+                bottom, right = max(bottom, self.maxX + 1), max(right, self.maxY + 1)
+            self.setBounds((top, left, bottom, right))
+        if deaths.__len__() != 0:
+            self.looseBounds = True
+
+    # a rectangle (top, left, bottom, right) that contains all the living cells, or None if there are none
+    def liveBounds(self):
+        if self.population == 0:
+            return None
+        if self.topology == 'plane':
+            return self.grid.bounds()
+        if self.looseBounds:
+            self.setBounds(self.grid.bounds(self.minX, self.minY, self.maxX + 1, self.maxY + 1))
+        return self.minX, self.minY, self.maxX + 1, self.maxY + 1
+
+    # the positions of all the cells on the board, in the order of the rows and then of the columns
+    def livePositions(self):
+        if self.population == 0:
+            return noPositions()
+        if self.topology == 'plane':
+            return self.grid.positions()
+        top, left, bottom, right = self.liveBounds()
+        return np.argwhere(self.grid.window(top, left, bottom, right)) + (top, left)
+
+    def isColored(self, row, col):
+        return self.grid.cellsAt(np.array([row]), np.array([col]))[0] != 0
+
+    def updatePositions(self, row, col):
+
+        if not self.isColored(row, col):
+            # now the painter actually draws the rectangle in the desired position
+            self.appendPosition(row, col)
+            return True
+        else:
+            # if the selected position is already colored, by clicking on it we can erase the drawn rectangle
+            self.removePosition(row, col)
+            return False
+
+    def appendPosition(self, row, col):
+        if self.isColored(row, col):
+            return
+        self.grid.setCell(row, col, 1)
+        self.editCells(positionsArray([row], [col]), noPositions())
+
+    def removePosition(self, row, col):
+        self.grid.setCell(row, col, 0)
+        self.editCells(noPositions(), positionsArray([row], [col]))
+
+    # keeps the population and the bounding box in sync with the grid after a change: the cost only depends on the
+    # number of changed cells. The change is also recorded in the history (as a change from the current generation),
+    # unless it comes from the history itself. A step of the grid gives back the bounding box anyway, so it doesn't
+    # widen it (and the positions of its change are only unpacked if the hash or the frontier need them)
+    def updateIndex(self, births, deaths, record=True, widen=True):
+        if record and self.rule.states == 2:
+            self.history.record(self.generation, births, deaths)
+        if self.detectCycles:
+            self.stateHash ^= hashPositions(changePositions(births)) ^ hashPositions(changePositions(deaths))
+        if self.stepping == 'frontier' and self.rule.states == 2:
+            self.frontier += [changePositions(births), changePositions(deaths)]
+        wasEmpty = self.population == 0
+        self.population += births.__len__() - deaths.__len__()
+        if widen and self.topology != 'plane':
+            self.widenBounds(births, deaths, wasEmpty)
+
+    # a change made by the user (or by loading a board) instead of the rules: it's part of the current state, so it's
+    # merged into the last change, as if the previous state had already been edited
+    def editCells(self, births, deaths, record=True):
+        self.updateIndex(births, deaths, record)
+        oldBirths, oldDeaths = (changePositions(positions) for positions in self.lastChange)
+        self.lastChange = (
+            np.concatenate([positionsDifference(oldBirths, deaths), positionsDifference(births, oldDeaths)]),
+            np.concatenate([positionsDifference(oldDeaths, births), positionsDifference(deaths, oldBirths)]))
+        self.resetCycle()
+
+    """
+        The new generation is computed on the sub grid given by the bounds, enlarged by one cell on each side (since
+        dead cells close to the border of the bounding box can become alive) and clipped to the grid edges. The
+        grid computes the whole sub grid in one go and gives back the cells to create (births) and to erase
+        (deaths). On a torus, a bounding box that touches the border means that the cells on the other side are
+        involved too, so the whole grid is computed with wraparound.
+        Gives back the previous change and the new one, each as (births, deaths) arrays of positions: the views draw
+        the new generation from the latter, and the previous one (in red) from the former. Only the changes inside
+        the window are given back, since on the plane the cells can go beyond it.
+        Once the game is in a cycle, the next generation is already known: it's the same change of one period ago,
+        which is taken from the history instead of being computed (and costs nothing at all for a still life).
+    """
+
+    def updateCells(self):
+        previous = self.lastChange
+
+        if self.population == 0:
+            if self.rule.states == 2:
+                self.history.record(self.generation, noPositions(), noPositions())
+            self.generation += 1
+            self.observeCycle()
+            self.lastChange = (noPositions(), noPositions())
+            return self.visibleChange(previous), self.lastChange
+        change = self.history.recentChange(self.cycle[1]) if self.cycle is not None else None
+        # the sub grid computed by the grid, if any
+        stepped = None
+        if change is not None:
+            births, deaths = change
+            for cells, value in ((births, 1), (deaths, 0)):
+                if cells.__len__() != 0:
+                    self.grid.setCells(cells[:, 0], cells[:, 1], value)
+            # the frontier only has to contain the last change
+            self.frontier = []
+        elif self.stepping == 'frontier' and self.rule.states == 2:
+            births, deaths = self.stepFrontier()
+        elif self.topology == 'torus' and (self.minX == 0 or self.minY == 0 or self.maxX == self.numRows - 1 or
+                                           self.maxY == self.numCols - 1):
+            births, deaths = self.grid.step(0, 0, self.numRows, self.numCols, wrap=True)
+            stepped = (0, 0, self.numRows, self.numCols)
+        else:
+            top = max(self.minX - 1, 0)
+            left = max(self.minY - 1, 0)
+            bottom = min(self.maxX + 2, self.numRows)
+            right = min(self.maxY + 2, self.numCols)
+            births, deaths = self.grid.step(top, left, bottom, right)
+            stepped = (top, left, bottom, right)
+
+        self.updateIndex(births, deaths, widen=stepped is None)
+        if stepped is not None and self.topology != 'plane':
+            self.setBounds(self.grid.bounds(*stepped))
+        self.generation += 1
+        self.observeCycle()
+        self.lastChange = (births, deaths)
+        return self.visibleChange(previous), self.visibleChange(self.lastChange)
+
+    def observeCycle(self):
+        if self.cycle is None and self.detectCycles and self.rule.states == 2:
+            self.cycle = self.cycles.observe(self.generation, self.stateHash)
+
+    # after the board is changed by something else than the game rules, the previous states tell nothing about the
+    # next ones: the detection starts again from the current state
+    def resetCycle(self):
+        self.cycle = None
+        self.cycles.reset()
+        if self.detectCycles:
+            self.cycles.observe(self.generation, self.stateHash)
+
+    # the hash isn't kept up to date while the detection is off, so it's computed again from the board
+    def setCycleDetection(self, detectCycles):
+        if detectCycles and not self.detectCycles:
+            self.stateHash = hashPositions(self.livePositions())
+        self.detectCycles = detectCycles
+        self.resetCycle()
+
+    # the given positions that fall inside the window (all of them, unless the topology is the plane)
+    def visible(self, positions):
+        if self.topology != 'plane':
+            return positions
+        return positions[(positions[:, 0] >= 0) & (positions[:, 0] < self.numRows) &
+                         (positions[:, 1] >= 0) & (positions[:, 1] < self.numCols)]
+
+    def visibleChange(self, change):
+        return self.visible(change[0]), self.visible(change[1])
+
+    # the change that leads from the start positions to the current ones, which becomes the last change
+    def changeFrom(self, startPositions):
+        positions = self.livePositions()
+        self.lastChange = (positionsDifference(positions, startPositions),
+                           positionsDifference(startPositions, positions))
+
+    """
+        Jumping ahead is delegated to the HashLife engine, which runs on an unbounded plane. The finite grid clips the
+        cells at its border at every generation, so on a bounded grid HashLife is only trusted for as many generations
+        as the living cells are far from the border (they can't spread faster than one cell per generation): the
+        jump is made of such advances, and the generations next to the border are computed one by one. HashLife can't
+        wrap around nor handle the dying states of the Generations rules, so in those cases every generation is
+        computed. The engine is kept between jumps (as long as the rule doesn't change), since its memoized results
+        make the following jumps faster.
+        The cycles are looked for during the jump even if they aren't otherwise: when the game is in a cycle of
+        period p the jump is arithmetic, since the whole periods lead back to the same state.
+        At most maxSteps generations are computed one by one, if given: the jump stops there, short of generations
+        (the caller can tell by the generation reached).
+    """
+
+    def jumpGenerations(self, generations, maxSteps=None):
+        previous = self.lastChange
+        startPositions = self.livePositions()
+        detectCycles = self.detectCycles
+        if not detectCycles:
+            self.setCycleDetection(True)
+
+        steps = 0
+        while generations > 0:
+            if self.cycle is not None:
+                skipped = generations - generations % self.cycle[1]
+                self.generation += skipped
+                generations -= skipped
+                if generations == 0:
+                    break
+            if self.population == 0:
+                self.generation += generations
+                break
+            margin = self.hashLifeMargin()
+            if margin > 0:
+                advance = min(margin, generations)
+                self.advanceHashLife(advance)
+                generations -= advance
+            elif maxSteps is not None and steps == maxSteps:
+                break
+            else:
+                self.updateCells()
+                generations -= 1
+                steps += 1
+
+        if not detectCycles:
+            self.setCycleDetection(False)
+        self.changeFrom(startPositions)
+        return self.visibleChange(previous), self.visibleChange(self.lastChange)
+
+    # how many generations HashLife can compute in one go: on a bounded grid, the distance of the living cells from
+    # the border
+    def hashLifeMargin(self):
+        if self.topology == 'torus' or self.rule.states > 2:
+            return 0
+        if self.topology == 'plane':
+            return float('inf')
+        top, left, bottom, right = self.liveBounds()
+        return min(top, left, self.numRows - bottom, self.numCols - right)
+
+    def advanceHashLife(self, generations):
+        if self.hashLife is None:
+            self.hashLife = HashLife(rule=self.rule)
+        startPositions = self.livePositions()
+        self.hashLife.setCells(map(tuple, startPositions.tolist()))
+        self.hashLife.advance(generations)
+        newPositions = np.array(self.hashLife.cells(), dtype=np.int64).reshape(-1, 2)
+        births = positionsDifference(newPositions, startPositions)
+        deaths = positionsDifference(startPositions, newPositions)
+        for cells, value in ((births, 1), (deaths, 0)):
+            if cells.__len__() != 0:
+                self.grid.setCells(cells[:, 0], cells[:, 1], value)
+        self.updateIndex(births, deaths)
+        # the cells that changed in the last generation aren't known, so every living cell is evaluated once
+        if self.stepping == 'frontier':
+            self.frontier = [self.livePositions()]
+        self.generation += generations
+        self.resetCycle()
+
+    """
+        Rewinding: the latest changes of the history are applied backwards, and the rewound ones can be applied
+        again. scrub() moves by many changes at once (backwards if steps is negative) and gives back the overall diff,
+        like updateCells(), so that the views draw the result with a single repaint. After rewinding, the frontier
+        has to include the cells of the change that comes before (a cell can only change next to the cells that
+        changed in the previous generation).
+    """
+
+    def scrub(self, steps):
+        previous = self.lastChange
+        startPositions = self.livePositions()
+        for _ in range(abs(steps)):
+            if steps < 0 and self.history.canUndo():
+                self.generation, births, deaths = self.history.undo(self.generation)
+                self.applyChange(deaths, births)
+            elif steps > 0 and self.history.canRedo():
+                self.generation, births, deaths = self.history.redo()
+                self.applyChange(births, deaths)
+
+        if self.stepping == 'frontier':
+            lastChange = self.history.lastChange()
+            self.frontier += [self.livePositions()] if lastChange is None else list(lastChange)
+        self.resetCycle()
+        self.changeFrom(startPositions)
+        return self.visibleChange(previous), self.visibleChange(self.lastChange)
+
+    def stepBack(self):
+        return self.scrub(-1)
+
+    # applies a change taken from the history, given as arrays of positions
+    def applyChange(self, births, deaths):
+        for cells, value in ((births, 1), (deaths, 0)):
+            if cells.__len__() != 0:
+                self.grid.setCells(cells[:, 0], cells[:, 1], value)
+        self.updateIndex(births, deaths, record=False)
+
+    # still lifes and isolated objects that didn't change are not in the frontier, so they cost nothing
+    def stepFrontier(self):
+        frontier = np.concatenate(self.frontier or [noPositions()])
+        self.frontier = []
+        if frontier.__len__() == 0:
+            return noPositions(), noPositions()
+        return stepPositions(self.grid, frontier, self.topology, self.rule)
+
+    def setStepping(self, stepping):
+        if stepping not in STEPPING_MODES:
+            raise ValueError('Unknown stepping mode: {}'.format(stepping))
+        # when switching to the frontier, nothing is known about the last generation, so every living cell has to
+        # be evaluated once
+        if stepping == 'frontier' and self.stepping != 'frontier':
+            self.frontier = [self.livePositions()]
+        self.stepping = stepping
+
+    """
+        The rule can be changed while the game runs. The cells in the states that the new rule doesn't have (dying
+        cells, when switching to a rule with fewer states) are removed. The states of the dying cells are not tracked
+        by the index, so with a Generations rule there is no history (and no rewinding), no cycle detection and no
+        frontier stepping (the dying cells change at every generation anyway, so the whole box is stepped).
+        Gives back the removed cells as a change, like updateCells().
+    """
+
+    def setRule(self, rule):
+        rule = parseRule(rule)
+        if rule.states > 2 and self.backend == 'packed':
+            raise ValueError('The packed backend only supports two-state rules')
+        deaths = noPositions()
+        if rule.states < self.rule.states and self.population != 0:
+            positions = self.livePositions()
+            deaths = positions[self.grid.cellsAt(positions[:, 0], positions[:, 1]) >= rule.states]
+            self.grid.setCells(deaths[:, 0], deaths[:, 1], 0)
+        self.rule = rule
+        if self.allocatedGrid is not None:
+            self.allocatedGrid.rule = rule
+        if self.rule.states > 2:
+            self.history.clear()
+        previous = self.lastChange
+        if deaths.__len__() != 0:
+            self.updateIndex(noPositions(), deaths)
+            self.lastChange = (noPositions(), deaths)
+        self.hashLife = None
+        if self.stepping == 'frontier':
+            self.frontier = [self.livePositions()]
+        self.resetCycle()
+        return self.visibleChange(previous), self.visibleChange((noPositions(), deaths))
+
+    # the current and the previous states as arrays, used by the views to draw a whole state at once
+    def stateArrays(self):
+        cells = self.grid.toArray()
+        oldCells = (cells != 0).view(np.uint8)
+        births, deaths = (changePositions(positions) for positions in self.visibleChange(self.lastChange))
+        for positions, value in ((births, 0), (deaths, 1)):
+            oldCells[positions[:, 0], positions[:, 1]] = value
+        return cells, oldCells
+
+    def clearAll(self):
+
+        self.lastChange = (noPositions(), noPositions())
+        self.generation = 0
+        self.history.clear()
+        self.stateHash = 0
+        self.resetCycle()
+        self.frontier = []
+        self.population = 0
+        self.setBounds(None)
+        if self.allocatedGrid is not None:
+            self.allocatedGrid.clear()
+
+
+    # raises a PatternTooLargeError if the cells of a snapshot don't fit on the board, before anything is changed
+    def checkSnapshot(self, snapshot):
+        outside = snapshot.top < 0 or snapshot.left < 0 or snapshot.top + snapshot.blockRows > self.numRows or \
+            snapshot.left + snapshot.blockCols > self.numCols
+        if outside and self.topology != 'plane':
+            raise PatternTooLargeError('Cannot load snapshot: the grid is too small.')
+
+    # replaces the board with the one of a snapshot (see snapshot.py), reading its cells a block of rows at a time
+    def loadSnapshot(self, snapshot):
+        self.checkSnapshot(snapshot)
+        self.clearAll()
+        for start in range(0, snapshot.blockRows, BLOCK_ROWS):
+            self.placePositions(snapshot.positions(start, start + BLOCK_ROWS), 0, 0, record=False)
+        # the history starts from the loaded board
+        self.history.clear()
+        self.generation = snapshot.generation
+        self.resetCycle()
+
+        return self.visible(self.livePositions())
+
+    @property
+    def grid(self):
+        if self.allocatedGrid is None:
+            if self.topology == 'plane':
+                # the plane has its own store, which only allocates the regions with living cells
+                self.allocatedGrid = ChunkedGrid(self.numRows, self.numCols)
+            else:
+                self.allocatedGrid = GRID_BACKENDS[self.backend](self.numRows, self.numCols)
+            self.allocatedGrid.rule = self.rule
+        return self.allocatedGrid
+
+    @property
+    def patternsNames(self):
+        return self.library.names
+
+    def loadPattern(self, index):
+        # getting the useful pieces of information: the patterns without a position are drawn in the centre
+        positions = self.library.load(index)
+        position = self.library.entries[index]['position']
+        if position is None:
+            position = self.centredPosition(positions)
+        self.clearAll()
+        self.placePositions(positions, position[0], position[1])
+
+        return self.visible(self.livePositions())
+
+    # the top-left corner that puts the given positions in the centre of the window
+    def centredPosition(self, positions):
+        size = positions.max(axis=0) + 1 if positions.__len__() != 0 else (0, 0)
+        return (self.numRows - int(size[0])) // 2, (self.numCols - int(size[1])) // 2
+
+    # draws a pattern (a list of rows of 0s and 1s) with its top-left corner in (row, col)
+    def placePattern(self, pattern, row, col):
+        self.placePositions(patternToPositions(pattern), row, col)
+
+    # draws the cells of an array of positions with the top-left corner in (row, col), writing all of them into the
+    # grid at once. The plane has no borders, so any pattern fits in it
+    def placePositions(self, positions, row, col, record=True):
+        if positions.__len__() == 0:
+            return
+        rows = positions[:, 0] + row
+        cols = positions[:, 1] + col
+        outside = rows.min() < 0 or cols.min() < 0 or rows.max() >= self.numRows or cols.max() >= self.numCols
+        if outside and self.topology != 'plane':
+            raise PatternTooLargeError('Cannot draw pattern: the grid is too small.')
+        dead = self.grid.cellsAt(rows, cols) == 0
+        rows = rows[dead]
+        cols = cols[dead]
+        self.grid.setCells(rows, cols, 1)
+        self.editCells(positionsArray(rows, cols), noPositions(), record)
+
+
+class PatternTooLargeError(Exception):
+    pass
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import weakref
+import numpy as np
+
+from multiprocessing import shared_memory
+
+from life.engine import DenseGrid, changedCells, stepCells
+from life.rules import CONWAY
+
+"""
+    ParallelGrid is a DenseGrid whose cells live in shared memory, so that a pool of worker processes can step them
+    without copying the grid around. The sub grid to compute is split into horizontal tiles, one task for each of
+    them: a worker reads its tile plus a one-row halo above and below (the border rows of the neighbouring tiles,
+    computed by other workers in the previous generation) from the current buffer and writes the new tile into the
+    next buffer, so that no worker reads cells that are being overwritten. Then the new sub grid is copied back into
+    the current buffer. The rule is applied by the same stepCells() of the serial engine, so the results are
+    identical.
+"""
+
+# below this number of cells the sub grid is computed in the main process, since the pool would only add overhead
+MIN_PARALLEL_CELLS = 1 << 16
+
+# the buffers as seen by a worker process, set by attachBuffers()
+workerBuffers = []
+
+
+def attachBuffers(names, shape):
+    # the workers are children of the process that created the blocks and share its resource tracker, so attaching
+    # them here doesn't make the workers responsible for their destruction
+    for name in names:
+        block = shared_memory.SharedMemory(name=name)
+        workerBuffers.append((block, np.ndarray(shape, dtype=np.uint8, buffer=block.buf)))
+
+
+def stepTile(task):
+    tileTop, tileBottom, top, bottom, left, right, rule = task
+    cells = workerBuffers[0][1]
+    nextCells = workerBuffers[1][1]
+    # the halo rows are included only if they belong to the sub grid, just like the serial engine does
+    haloTop = max(tileTop - 1, top)
+    haloBottom = min(tileBottom + 1, bottom)
+    newTile = stepCells(cells[haloTop: haloBottom, left: right], rule=rule)[tileTop - haloTop: tileBottom - haloTop]
+    tile = cells[tileTop: tileBottom, left: right]
+    nextCells[tileTop: tileBottom, left: right] = newTile
+    born, dead = changedCells(tile, newTile, rule)
+    births = np.argwhere(born) + (tileTop, left)
+    deaths = np.argwhere(dead) + (tileTop, left)
+    return births, deaths
+
+
+def releaseResources(blocks, pools):
+    for pool in pools:
+        pool.terminate()
+        pool.join()
+    pools.clear()
+    for block in blocks:
+        block.unlink()
+        try:
+            block.close()
+        except BufferError:
+            # some array still points to the block: the memory is released when the process exits
+            pass
+    blocks.clear()
+
+
+class ParallelGrid(DenseGrid):
+
+    def __init__(self, numRows, numCols, workers=None):
+        self.numRows = numRows
+        self.numCols = numCols
+        self.workers = workers if workers is not None else os.cpu_count()
+        size = max(self.numRows * self.numCols, 1)
+        self.blocks = [shared_memory.SharedMemory(create=True, size=size) for _ in range(2)]
+        self.cells = np.ndarray((self.numRows, self.numCols), dtype=np.uint8, buffer=self.blocks[0].buf)
+        self.nextCells = np.ndarray((self.numRows, self.numCols), dtype=np.uint8, buffer=self.blocks[1].buf)
+        self.cells[:] = 0
+        self.rule = CONWAY
+        # the pool is started on the first large step. The shared memory and the pool are released by close(), or
+        # when the grid is garbage collected or the program exits
+        self.pool = None
+        self.pools = []
+        self.finalizer = weakref.finalize(self, releaseResources, self.blocks, self.pools)
+
+    def clear(self):
+        # the cells must stay in the shared buffer, so they are zeroed instead of reallocated
+        self.cells[:] = 0
+
+    def step(self, top, left, bottom, right, wrap=False):
+        # the tiles halos don't wrap around, so a torus is stepped by the serial engine
+        if (bottom - top) * (right - left) < MIN_PARALLEL_CELLS or self.workers < 2 or wrap:
+            return super().step(top, left, bottom, right, wrap)
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers, initializer=attachBuffers,
+                                             initargs=([b.name for b in self.blocks], (self.numRows, self.numCols)))
+            self.pools.append(self.pool)
+
+        # a few tiles for each worker, so that a slow tile doesn't keep the others waiting
+        numTiles = min(self.workers * 4, bottom - top)
+        bounds = np.linspace(top, bottom, numTiles + 1).astype(int)
+        tasks = [(int(bounds[i]), int(bounds[i + 1]), top, bottom, left, right, self.rule) for i in range(numTiles)]
+        tiles = self.pool.map(stepTile, tasks)
+
+        self.cells[top: bottom, left: right] = self.nextCells[top: bottom, left: right]
+        return np.concatenate([t[0] for t in tiles]), np.concatenate([t[1] for t in tiles])
+
+    def close(self):
+        # the arrays must be released before the shared memory they point to
+        self.cells = self.cells.copy()
+        self.nextCells = None
+        self.pool = None
+        self.finalizer()
@@ -0,0 +1,136 @@
+import os
+import re
+import numpy as np
+
+"""
+    Reading and writing pattern files. A pattern is a list of rows of 0s and 1s, just like the ones in patterns.json.
+    Files use the plaintext format ('.cells'): '!' starts a comment line, 'O' is a living cell and '.' a dead one.
+"""
+
+
+def readPattern(path):
+    pattern = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line.startswith('!'):
+                continue
+            pattern.append([1 if ch in 'O*' else 0 for ch in line])
+    return pattern
+
+
+def writePattern(path, positions, comment=None):
+    # the written pattern is the smallest rectangle containing all the positions
+    positions = list(positions)
+    with open(path, 'w') as f:
+        if comment is not None:
+            f.write('!{}\n'.format(comment))
+        if positions.__len__() == 0:
+            return
+        minRow = min(p[0] for p in positions)
+        minCol = min(p[1] for p in positions)
+        numRows = max(p[0] for p in positions) - minRow + 1
+        numCols = max(p[1] for p in positions) - minCol + 1
+        rows = [['.'] * numCols for _ in range(numRows)]
+        for p in positions:
+            rows[p[0] - minRow][p[1] - minCol] = 'O'
+        for r in rows:
+            f.write(''.join(r) + '\n')
+
+
+"""
+    Large patterns are exchanged as RLE ('.rle') or Life 1.06 ('.lif', '.life') files, and they're read as arrays of
+    (row, col) positions instead of lists of rows, since a pattern of millions of cells would need a Python list for
+    each row. The positions are relative to the top-left corner of the pattern.
+    RLE files start with a header like 'x = 3, y = 3, rule = B3/S23' (preceded by '#' comment lines, '#N' giving the
+    name), followed by runs of cells: '<count>b' for dead cells, '<count>o' for living ones, '<count>$' for the end
+    of rows and '!' for the end of the pattern. Life 1.06 files have a '#Life 1.06' header and a 'x y' line for each
+    living cell.
+"""
+
+PATTERN_EXTENSIONS = ['.rle', '.lif', '.life', '.cells']
+RLE_HEADER = re.compile(r'x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)')
+
+
+def patternToPositions(pattern):
+    return np.array([(r, c) for r in range(pattern.__len__()) for c in range(pattern[r].__len__())
+                     if pattern[r][c] == 1], dtype=np.int64).reshape(-1, 2)
+
+
+def readRLEHeader(path):
+    # only the comments and the header are read: (name, rows, cols), where the name is None without a '#N' line
+    name = None
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('#N'):
+                name = line[2:].strip() or None
+            elif line.startswith('#') or line == '':
+                continue
+            else:
+                match = RLE_HEADER.match(line)
+                if match is None:
+                    raise ValueError('Invalid RLE header in {}'.format(path))
+                return name, int(match.group(2)), int(match.group(1))
+    raise ValueError('Missing RLE header in {}'.format(path))
+
+
+def readRLE(path):
+    with open(path, 'r') as f:
+        lines = [line.strip() for line in f if line.strip() != '' and not line.startswith('#')]
+    body = ''.join(line for line in lines[1:]).split('!', 1)[0]
+    chars = np.frombuffer(''.join(body.split()).encode('ascii'), dtype=np.uint8)
+    isDigit = (chars >= ord('0')) & (chars <= ord('9'))
+    tagIndices = np.flatnonzero(~isDigit)
+    if tagIndices.__len__() == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    tags = chars[tagIndices]
+
+    # the counts are parsed without looking at the runs one by one: each digit is worth its value times the power of
+    # ten given by its distance from the tag that follows it, and the digits of each tag are summed (no digits = 1)
+    digitIndices = np.flatnonzero(isDigit)
+    owners = np.searchsorted(tagIndices, digitIndices)
+    values = (chars[digitIndices] - ord('0')).astype(np.int64) * 10 ** (tagIndices[owners] - digitIndices - 1)
+    counts = np.bincount(owners, weights=values, minlength=tagIndices.__len__()).astype(np.int64)
+    counts[np.bincount(owners, minlength=tagIndices.__len__()) == 0] = 1
+
+    # the position of every run is computed at once: the row is the number of line ends before it, while the column
+    # is the length of the runs before it, minus the ones in the previous rows
+    lineEnds = tags == ord('$')
+    rows = np.cumsum(np.where(lineEnds, counts, 0)) - np.where(lineEnds, counts, 0)
+    advance = np.where(lineEnds, 0, counts)
+    covered = np.cumsum(advance)
+    rowStarts = np.maximum.accumulate(np.where(lineEnds, covered, 0))
+    cols = covered - advance - rowStarts
+
+    # the runs of living cells are expanded into cells: each cell is the first column of its run plus its index in it
+    alive = ~lineEnds & (tags != ord('b')) & (tags != ord('.'))
+    runLengths = counts[alive]
+    runStarts = np.repeat(np.cumsum(runLengths) - runLengths, runLengths)
+    cellCols = np.repeat(cols[alive], runLengths) + np.arange(runStarts.__len__()) - runStarts
+    cellRows = np.repeat(rows[alive], runLengths)
+    return np.stack([cellRows, cellCols], axis=1)
+
+
+def readLife106(path):
+    with open(path, 'r') as f:
+        header = f.readline().strip()
+        if not header.startswith('#Life 1.06'):
+            raise ValueError('Not a Life 1.06 file: {}'.format(path))
+        text = ' '.join(line for line in f if not line.startswith('#'))
+    coordinates = np.array(text.split(), dtype=np.int64).reshape(-1, 2)
+    if coordinates.__len__() == 0:
+        return coordinates
+    # the file gives (x, y) coordinates around an arbitrary origin
+    positions = np.unique(coordinates[:, ::-1], axis=0)
+    return positions - positions.min(axis=0)
+
+
+# reads a pattern file of any of the supported formats as an array of positions
+def readPositions(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.rle':
+        return readRLE(path)
+    if extension in ('.lif', '.life'):
+        return readLife106(path)
+    return patternToPositions(readPattern(path))
@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+
+from collections import deque
+
+"""
+    Instrumentation of the step/render pipeline. The code measures its stages with a pair of calls:
+
+        start = profiler.start()
+        ...
+        profiler.stop('compute', start)
+
+    and reports counters (e.g. the paint calls, with count()) and sampled values (e.g. the diff size, with
+    sample()). While the profiler is disabled start() gives back None and every other call returns immediately, so
+    the instrumentation costs a function call per stage.
+    While enabled, the profiler keeps the latest values of every stage for the on-screen overlay (see summary()) and
+    a bounded list of events, which exportTrace() writes in the Chrome trace format (it can be opened with
+    chrome://tracing or https://ui.perfetto.dev).
+"""
+
+
+class Profiler:
+
+    def __init__(self, maxEvents=200000, window=120):
+        self.enabled = False
+        self.window = window
+        self.lock = threading.Lock()
+        self.events = deque(maxlen=maxEvents)
+        self.origin = time.perf_counter()
+        # name -> latest values (durations in seconds for the stages), and name -> total for the counters
+        self.stages = {}
+        self.samples = {}
+        self.counters = {}
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self.lock:
+            self.events.clear()
+            self.origin = time.perf_counter()
+            self.stages = {}
+            self.samples = {}
+            self.counters = {}
+
+    def start(self):
+        if not self.enabled:
+            return None
+        return time.perf_counter()
+
+    def stop(self, stage, start):
+        if start is None or not self.enabled:
+            return
+        end = time.perf_counter()
+        with self.lock:
+            self.stages.setdefault(stage, deque(maxlen=self.window)).append(end - start)
+            self.events.append({'name': stage, 'ph': 'X', 'ts': (start - self.origin) * 1e6,
+                                'dur': (end - start) * 1e6, 'pid': 0, 'tid': threading.get_ident()})
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def sample(self, name, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.samples.setdefault(name, deque(maxlen=self.window)).append(value)
+            self.events.append({'name': name, 'ph': 'C', 'ts': (time.perf_counter() - self.origin) * 1e6,
+                                'pid': 0, 'args': {name: value}})
+
+    # the latest, mean and maximum values of the stages (in milliseconds) and of the samples, and the counters totals
+    def summary(self):
+        with self.lock:
+            stages = {name: describe([v * 1000 for v in values]) for name, values in self.stages.items()}
+            samples = {name: describe(list(values)) for name, values in self.samples.items()}
+            return {'stages': stages, 'samples': samples, 'counters': dict(self.counters)}
+
+    def exportTrace(self, path):
+        with self.lock:
+            events = list(self.events)
+            counters = dict(self.counters)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'counters': counters}}, f)
+
+
+def describe(values):
+    return {'last': values[-1], 'mean': sum(values) / values.__len__(), 'max': max(values), 'n': values.__len__()}
+
+
+# the profiler shared by the whole program
+profiler = Profiler()
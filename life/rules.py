@@ -0,0 +1,109 @@
+import re
+
+import numpy as np
+
+"""
+    The rules of the game. A rule tells, from the number of living neighbours, when a dead cell is born (B) and when a
+    living cell survives (S): Conway's Game of Life is B3/S23. "Generations" rules add a number of states (C): a
+    living cell that doesn't survive doesn't die at once, but goes through C - 2 dying states, one per generation,
+    during which it isn't counted as a neighbour and can't be born again.
+    The states are 0 for the dead cells, 1 for the living ones and 2, ..., C - 1 for the dying ones. Every rule is
+    compiled into a lookup table of C x 9 entries, indexed by the state of a cell and the number of its living
+    neighbours (flattened, the index is 9 * state + neighbours). With two states the table is further compiled into
+    the runs of consecutive indices that lead to a living cell, so that the engine can apply it with a couple of
+    comparisons per run instead of an array lookup, which NumPy does much more slowly (Conway's rule has two runs:
+    index 3, and indices 11 and 12).
+    Rules with B0 (cells born with no neighbours at all) are not supported, since the engines only compute the cells
+    close to the living ones.
+"""
+
+
+class Rule:
+
+    def __init__(self, birth, survival, states=2, name=None):
+        self.birth = frozenset(birth)
+        self.survival = frozenset(survival)
+        self.states = states
+        if not self.birth.union(self.survival) <= set(range(9)):
+            raise ValueError('The neighbours counts must be between 0 and 8')
+        if 0 in self.birth:
+            raise ValueError('Rules with B0 are not supported')
+        if self.states < 2:
+            raise ValueError('A rule needs at least two states')
+        self.name = name if name is not None else self.notation()
+        self.table = np.zeros((self.states, 9), dtype=np.uint8)
+        for count in range(9):
+            self.table[0, count] = 1 if count in self.birth else 0
+            # a living cell that doesn't survive starts dying (or just dies, with two states)
+            self.table[1, count] = 1 if count in self.survival else 2 % self.states
+        for state in range(2, self.states):
+            self.table[state, :] = (state + 1) % self.states
+        # the (first index, length) runs of the flattened table that lead to a living cell
+        self.runs = []
+        if self.states == 2:
+            for index, value in enumerate(self.table.ravel().tolist()):
+                if value != 1:
+                    continue
+                if self.runs and self.runs[-1][0] + self.runs[-1][1] == index:
+                    self.runs[-1] = (self.runs[-1][0], self.runs[-1][1] + 1)
+                else:
+                    self.runs.append((index, 1))
+
+    def notation(self):
+        text = 'B{}/S{}'.format(''.join(map(str, sorted(self.birth))), ''.join(map(str, sorted(self.survival))))
+        if self.states > 2:
+            text += '/C{}'.format(self.states)
+        return text
+
+    def __eq__(self, other):
+        return isinstance(other, Rule) and (self.birth, self.survival, self.states) == \
+            (other.birth, other.survival, other.states)
+
+    def __hash__(self):
+        return hash((self.birth, self.survival, self.states))
+
+    def __repr__(self):
+        return 'Rule({})'.format(self.notation())
+
+
+# the notations of a rule, matched against the whole text (without spaces): B/S ('B36/S23'), S/B with the letters
+# ('S23/B36'), and S/B with the numbers alone ('23/36'), all of them followed by the states of a Generations rule
+# ('B2/S/C3', '/2/3')
+RULE_NOTATIONS = [
+    re.compile(r'B(?P<birth>\d*)/S(?P<survival>\d*)(?:/[CG](?P<states>\d+))?', re.IGNORECASE),
+    re.compile(r'S(?P<survival>\d*)/B(?P<birth>\d*)(?:/[CG](?P<states>\d+))?', re.IGNORECASE),
+    re.compile(r'(?P<survival>\d*)/(?P<birth>\d*)(?:/(?P<states>\d+))?'),
+]
+
+
+# parses a rule in one of the RULE_NOTATIONS, or the name of one of the RULES
+def parseRule(text):
+    if isinstance(text, Rule):
+        return text
+    if text in RULES:
+        return RULES[text]
+    for notation in RULE_NOTATIONS:
+        match = notation.fullmatch(text.replace(' ', ''))
+        if match is not None:
+            break
+    else:
+        raise ValueError('{!r} is not a known rule, nor a rule in B/S (B36/S23), S/B (23/36) or Generations '
+                         '(B2/S/C3) notation'.format(text))
+    states = int(match.group('states')) if match.group('states') is not None else 2
+    try:
+        return Rule(map(int, match.group('birth')), map(int, match.group('survival')), states)
+    except ValueError as e:
+        raise ValueError('{!r}: {}'.format(text, e)) from None
+
+
+CONWAY = Rule([3], [2, 3], name='Conway')
+# the rules offered by the GUI, by name
+RULES = {
+    'Conway': CONWAY,
+    'HighLife': Rule([3, 6], [2, 3], name='HighLife'),
+    'Day & Night': Rule([3, 6, 7, 8], [3, 4, 6, 7, 8], name='Day & Night'),
+    'Seeds': Rule([2], [], name='Seeds'),
+    'Life without Death': Rule([3], range(9), name='Life without Death'),
+    "Brian's Brain": Rule([2], [], 3, name="Brian's Brain"),
+    'Star Wars': Rule([2], [3, 4, 5], 4, name='Star Wars'),
+}
@@ -0,0 +1,111 @@
+import json
+import mmap
+import os
+import struct
+import numpy as np
+
+"""
+    Binary snapshots of a board ('.snap' files), meant to save long runs and resume them later. A snapshot stores the
+    generation number, the size of the board and the smallest rectangle containing the living cells, packed into
+    bits with the same layout of the PackedGrid (see bitgrid.py): each row of the rectangle is a sequence of
+    little-endian uint64 words, where bit b of word w is the cell in column 64 * w + b. The file is laid out as:
+
+        header | metadata (JSON, padded to 8 bytes) | words
+
+    so the cells can be memory-mapped and read as an array without parsing anything: readSnapshot() maps the file,
+    and the Model reads the cells a block of rows at a time (see Model.loadSnapshot()), so that even a huge board is
+    never unpacked all at once.
+    The metadata holds the topology and the rule of the board. A bit per cell can't tell the dying states of the
+    Generations rules apart, so the dying cells are saved as living ones.
+"""
+
+SNAPSHOT_EXTENSION = '.snap'
+MAGIC = b'LIFESNAP'
+VERSION = 1
+# magic, version, flags, generation, board rows and columns, top-left corner and size of the rectangle, metadata size
+HEADER = struct.Struct('<8sHHqqqqqqqI')
+WORD_BITS = 64
+# the rows packed or unpacked at once, so that the memory used doesn't grow with the board
+BLOCK_ROWS = 1024
+
+
+def alignedSize(size):
+    return (size + 7) // 8 * 8
+
+
+"""
+    The snapshot is written to a temporary file that then replaces the destination, so that a checkpoint interrupted
+    halfway (e.g. by killing a long run) never destroys the previous one.
+"""
+
+
+def writeSnapshot(path, model, metadata=None):
+    metadata = dict(metadata or {})
+    metadata.setdefault('topology', model.topology)
+    metadata.setdefault('rule', model.rule.notation())
+    metadataBytes = json.dumps(metadata).encode('utf-8')
+    bounds = model.liveBounds()
+    if bounds is None:
+        bounds = (0, 0, 0, 0)
+    top, left, bottom, right = bounds
+    numWords = (right - left + WORD_BITS - 1) // WORD_BITS
+
+    temporaryPath = path + '.tmp'
+    with open(temporaryPath, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, model.generation, model.numRows, model.numCols, top, left,
+                            bottom - top, right - left, metadataBytes.__len__()))
+        f.write(metadataBytes.ljust(alignedSize(HEADER.size + metadataBytes.__len__()) - HEADER.size, b'\0'))
+        for blockTop in range(top, bottom, BLOCK_ROWS):
+            blockBottom = min(blockTop + BLOCK_ROWS, bottom)
+            cells = np.zeros((blockBottom - blockTop, numWords * WORD_BITS), dtype=np.uint8)
+            cells[:, :right - left] = model.grid.window(blockTop, left, blockBottom, right)
+            f.write(np.packbits(cells, axis=1, bitorder='little').tobytes())
+    os.replace(temporaryPath, path)
+
+
+class Snapshot:
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if header.__len__() < HEADER.size or header[:8] != MAGIC:
+                raise ValueError('Not a snapshot file: {}'.format(path))
+            (_, version, _, self.generation, self.numRows, self.numCols, self.top, self.left, self.blockRows,
+             self.blockCols, metadataSize) = HEADER.unpack(header)
+            if version != VERSION:
+                raise ValueError('Unsupported snapshot version: {}'.format(version))
+            self.metadata = json.loads(f.read(metadataSize).decode('utf-8'))
+            self.numWords = (self.blockCols + WORD_BITS - 1) // WORD_BITS
+            offset = alignedSize(HEADER.size + metadataSize)
+            self.map = None
+            if self.blockRows * self.numWords == 0:
+                self.words = np.zeros((self.blockRows, self.numWords), dtype='<u8')
+            else:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.words = np.frombuffer(self.map, dtype='<u8', count=self.blockRows * self.numWords,
+                                           offset=offset).reshape(self.blockRows, self.numWords)
+        self.topology = self.metadata.get('topology', 'bounded')
+        self.rule = self.metadata.get('rule', 'B3/S23')
+
+    # the positions of the living cells in the rows [start, stop) of the rectangle, as board coordinates
+    def positions(self, start, stop):
+        bytesView = self.words[start: stop].view(np.uint8)
+        cells = np.unpackbits(bytesView, axis=1, bitorder='little')[:, :self.blockCols]
+        return np.argwhere(cells) + (self.top + start, self.left)
+
+    def close(self):
+        # the array must be released before the map it points to
+        self.words = None
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def readSnapshot(path):
+    return Snapshot(path)
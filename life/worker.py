@@ -0,0 +1,90 @@
+import queue
+import threading
+import time
+
+from collections import deque
+
+from life.profiler import profiler
+
+"""
+    The SimulationWorker runs the game in a background thread, so that a slow generation doesn't freeze the GUI.
+    After each generation it publishes a snapshot (the generation number and a copy of the cells array) into a small
+    bounded queue: when the GUI can't keep up, the oldest snapshots are dropped, and the GUI only draws the latest
+    one at each frame. The worker and the GUI share the Model, so every access to it goes through model.lock.
+    What goes into the snapshot is up to the view: by default it's a copy of the whole grid, but a view that shows
+    only a part of the board can give a capture function that copies just that part.
+"""
+
+
+class SimulationWorker(threading.Thread):
+
+    def __init__(self, model, fps, maxSnapshots=2, capture=None):
+        super().__init__(daemon=True)
+        self.model = model
+        self.fps = fps
+        self.snapshots = queue.Queue(maxsize=maxSnapshots)
+        self.stopEvent = threading.Event()
+        self.generation = 0
+        # called while holding the lock, it gives back the cells to publish
+        self.capture = capture if capture is not None else self.captureGrid
+        # timestamps of the latest generations, used to measure the achieved rate
+        self.timestamps = deque(maxlen=120)
+
+    def run(self):
+        nextTime = time.perf_counter()
+        while not self.stopEvent.is_set():
+            # the snapshot is published while holding the lock, so that the GUI can discard the stale ones after
+            # changing the Model (e.g. clearing it) without racing with the worker
+            with self.model.lock:
+                start = profiler.start()
+                _, (births, deaths) = self.model.updateCells()
+                profiler.stop('compute', start)
+                profiler.sample('diff size', births.__len__() + deaths.__len__())
+                self.generation += 1
+                start = profiler.start()
+                self.publish((self.generation, self.capture()))
+                profiler.stop('snapshot', start)
+
+            now = time.perf_counter()
+            self.timestamps.append(now)
+
+            # the generations are paced to the requested rate, but if the worker is late it doesn't try to catch up
+            nextTime += 1 / self.fps
+            if nextTime > now:
+                self.stopEvent.wait(nextTime - now)
+            else:
+                nextTime = now
+
+    def captureGrid(self):
+        return self.model.grid.toArray()
+
+    def publish(self, snapshot):
+        while True:
+            try:
+                self.snapshots.put_nowait(snapshot)
+                return
+            except queue.Full:
+                # dropping the oldest snapshot, which the GUI would never draw anyway
+                try:
+                    self.snapshots.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def latestSnapshot(self):
+        snapshot = None
+        while True:
+            try:
+                snapshot = self.snapshots.get_nowait()
+            except queue.Empty:
+                return snapshot
+
+    # generations per second, measured since the oldest stored timestamp
+    def achievedRate(self):
+        timestamps = list(self.timestamps)
+        if timestamps.__len__() < 2:
+            return 0
+        return (timestamps.__len__() - 1) / (time.perf_counter() - timestamps[0])
+
+    def stop(self):
+        self.stopEvent.set()
+        self.join()
@@ -1,14 +1,69 @@
+import time
+
+# the startup is measured from here, before Qt and numpy are imported
+START_TIME = time.perf_counter()
+
+import argparse
 import sys
 
+from PyQt5.QtCore import QEvent, QObject, QTimer
 from PyQt5.QtWidgets import QApplication
 
+from life.model import TOPOLOGIES
 from window import MainWindow
 
+"""
+    The time to the first frame (from the start of this script to the end of the first painting of the window) is
+    measured with --measure-startup, which prints it and quits: benchmark.py runs it on a few board sizes. The target
+    is STARTUP_TARGET_MS on every renderer, whatever the size of the board.
+"""
+
+STARTUP_TARGET_MS = 300
+
+
+# watches the events of the whole application, and reports the time as soon as the first painting is over
+class FirstFrameTimer(QObject):
+
+    def __init__(self, app, callback):
+        super().__init__()
+        self.app = app
+        self.callback = callback
+        app.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Paint:
+            self.app.removeEventFilter(self)
+            # the widgets of the window are painted together, so the frame is complete on the next loop iteration
+            QTimer.singleShot(0, lambda: self.callback(1000 * (time.perf_counter() - START_TIME)))
+        return False
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description="Conway's Game of Life.")
+    parser.add_argument('--rows', type=int, default=40, help='number of rows of the board')
+    parser.add_argument('--cols', type=int, default=50, help='number of columns of the board')
+    parser.add_argument('--edge', type=int, default=10, help='square edge in pixels (the initial zoom of the viewport)')
+    parser.add_argument('--renderer', choices=['painter', 'image', 'viewport'], default='painter',
+                        help="'viewport' shows a zoomable window on boards larger than the screen")
+    parser.add_argument('--topology', choices=TOPOLOGIES, default='bounded',
+                        help="borders of the board: 'torus' wraps around, 'plane' is infinite (the board shows a part)")
+    parser.add_argument('--measure-startup', action='store_true',
+                        help='print the time to the first frame and quit')
+    return parser.parse_args(argv)
+
+
+def reportStartup(app, elapsed):
+    print('first frame after {:.0f} ms (target {} ms)'.format(elapsed, STARTUP_TARGET_MS))
+    app.quit()
+
 
 if __name__ == '__main__':
 
     app = QApplication(sys.argv)
+    args = parseArguments(app.arguments()[1:])
 
-    window = MainWindow(10, 40, 50)
+    if args.measure_startup:
+        firstFrameTimer = FirstFrameTimer(app, lambda elapsed: reportStartup(app, elapsed))
+    window = MainWindow(args.edge, args.rows, args.cols, renderer=args.renderer, topology=args.topology)
     window.show()
     app.exec_()
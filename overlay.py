@@ -0,0 +1,56 @@
+import time
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QLabel
+
+from life.profiler import profiler
+
+"""
+    ProfilerOverlay shows the profiler measurements on top of the canvas: the time taken by each stage of the
+    pipeline (latest, mean and maximum over the last generations), the sampled values and the counters per second.
+    It's hidden (and its timer stopped) until the profiler is enabled, so it costs nothing otherwise.
+"""
+
+
+class ProfilerOverlay(QLabel):
+
+    def __init__(self, canvas):
+        super().__init__(canvas)
+        self.setStyleSheet('background-color: rgba(0, 0, 0, 160); color: white; padding: 4px;')
+        self.setFont(QFont('Monospace', 8))
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.move(4, 4)
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.refresh)
+        self.lastCounters = {}
+        self.lastTime = None
+        self.hide()
+
+    def showEvent(self, ev):
+        self.lastCounters = {}
+        self.lastTime = time.perf_counter()
+        self.timer.start(500)
+        self.refresh()
+        super().showEvent(ev)
+
+    def hideEvent(self, ev):
+        self.timer.stop()
+        super().hideEvent(ev)
+
+    def refresh(self):
+        summary = profiler.summary()
+        now = time.perf_counter()
+        elapsed = max(now - self.lastTime, 1e-6)
+        lines = ['{:<17}{:>8}{:>8}{:>8}'.format('stage (ms)', 'last', 'mean', 'max')]
+        for name, values in sorted(summary['stages'].items()):
+            lines.append('{:<17}{:>8.2f}{:>8.2f}{:>8.2f}'.format(name, values['last'], values['mean'], values['max']))
+        for name, values in sorted(summary['samples'].items()):
+            lines.append('{:<17}{:>8.1f}{:>8.1f}{:>8.1f}'.format(name, values['last'], values['mean'], values['max']))
+        for name, total in sorted(summary['counters'].items()):
+            rate = (total - self.lastCounters.get(name, 0)) / elapsed
+            lines.append('{:<17}{:>8.0f}/s'.format(name, rate))
+        self.lastCounters = summary['counters']
+        self.lastTime = now
+        self.setText('\n'.join(lines))
+        self.adjustSize()
@@ -0,0 +1,350 @@
+import argparse
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+import numpy as np
+
+from cli import createModel
+from life import PatternTooLargeError, GRID_BACKENDS, STEPPING_MODES, TOPOLOGIES
+
+"""
+    Headless recorder: it plays a run without the GUI and records its generations as an animated GIF, or as a
+    sequence of PNG files (one per frame, e.g. for ffmpeg) when the output isn't a .gif file. For example:
+
+        python record.py "Gosper Glider Gun" --rows 60 --cols 80 --generations 500 --cell-size 6 --output gun.gif
+        python record.py soup.rle --rows 500 --cols 500 --generations 10000 --every 10 --output frames/
+
+    The recording is a pipeline of generators, each one consuming the items of the previous one: the simulation
+    gives the cells of every recorded generation, which are rendered into frames of palette indices (cell-size
+    pixels per cell), which are encoded into the bytes of the GIF images or of the PNG files, which are written to
+    the output as they come. The simulation and the rendering run in a thread, the encoding in another one and the
+    writing in the main thread, linked by bounded queues (see prefetch()): the encoding overlaps with the following
+    generations, and since no stage can get more than a few frames ahead of the next one, and the encoded frames are
+    written straight away, the memory doesn't grow with the length of the run.
+    The GIF images after the first one only cover the rectangle of the cells that changed since the previous frame,
+    drawn over it, and the generations that don't change anything just make the previous image last longer. The GIF
+    and PNG encoders are written here with numpy and zlib, so that nothing else has to be installed.
+"""
+
+# palette indices of the frames: the colours of the cells are the ones of the canvases
+DEAD = 0
+ALIVE = 1
+DYING = 2
+PALETTE = [(255, 255, 255), (0, 255, 0), (0, 128, 0), (0, 0, 0)]
+# frames that each stage of the pipeline can be ahead of the next one
+QUEUE_SIZE = 4
+
+
+"""
+    The pipeline stages.
+"""
+
+
+# the cells of every recorded generation, starting from the initial one
+def simulate(model, generations, every):
+    for generation in range(0, generations + 1, every):
+        if generation > 0:
+            for _ in range(every):
+                model.updateCells()
+        # the plane has no borders, so the same window of it is always recorded
+        yield generation, model.grid.window(0, 0, model.numRows, model.numCols)
+
+
+# frames as (generation, top, left, pixels), where the pixels are the palette indices of the rectangle of the board
+# whose top-left corner is (top, left) pixels, or None if nothing changed since the previous frame. Without delta,
+# each frame covers the whole board
+def renderFrames(states, cellSize, delta):
+    previous = None
+    for generation, cells in states:
+        top, left, bottom, right = 0, 0, cells.shape[0], cells.shape[1]
+        if previous is not None:
+            changed = cells != previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            if rows.__len__() == 0:
+                yield generation, 0, 0, None
+                continue
+            if delta:
+                cols = np.flatnonzero(changed.any(axis=0))
+                top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        previous = cells
+        indices = np.minimum(cells[top: bottom, left: right], DYING).astype(np.uint8)
+        pixels = np.repeat(np.repeat(indices, cellSize, axis=0), cellSize, axis=1)
+        yield generation, top * cellSize, left * cellSize, pixels
+
+
+# runs the iterable in a background thread, giving back its items through a bounded queue
+def prefetch(iterable, size=QUEUE_SIZE):
+    items = queue.Queue(maxsize=size)
+    stopEvent = threading.Event()
+    done = object()
+
+    # waits for room in the queue, unless the consumer has gone away
+    def put(item):
+        while not stopEvent.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            # the exception is raised again by the consumer
+            put((done, e))
+        finally:
+            # the previous stages stop as well
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopEvent.set()
+        thread.join()
+
+
+"""
+    GIF encoding: the image data is compressed with the variable-length LZW of the GIF format, and split into
+    sub-blocks of at most 255 bytes. The palette has four colours, so the codes start from three bits.
+"""
+
+MIN_CODE_SIZE = 2
+MAX_CODE = 4096
+
+
+def lzwEncode(data, minCodeSize):
+    clearCode = 1 << minCodeSize
+    codeSize = minCodeSize + 1
+    nextCode = clearCode + 2
+    # (prefix code << 8 | byte) -> code of the sequence
+    table = {}
+    out = bytearray()
+    # the codes are packed starting from the least significant bits
+    bits = clearCode
+    bitCount = codeSize
+    prefix = data[0]
+    for byte in data[1:]:
+        key = prefix << 8 | byte
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        bits |= prefix << bitCount
+        bitCount += codeSize
+        if nextCode < MAX_CODE:
+            table[key] = nextCode
+            # the decoder is a code behind, so the codes get longer after the first one that needs it is added
+            if nextCode == 1 << codeSize:
+                codeSize += 1
+            nextCode += 1
+        else:
+            # the table is full: it starts over
+            bits |= clearCode << bitCount
+            bitCount += codeSize
+            table.clear()
+            codeSize = minCodeSize + 1
+            nextCode = clearCode + 2
+        prefix = byte
+        if bitCount >= 64:
+            out += (bits & 0xffffffffffffffff).to_bytes(8, 'little')
+            bits >>= 64
+            bitCount -= 64
+    for code in (prefix, clearCode + 1):
+        bits |= code << bitCount
+        bitCount += codeSize
+    out += bits.to_bytes((bitCount + 7) // 8, 'little')
+    return bytes(out)
+
+
+def subBlocks(data):
+    blocks = bytearray()
+    for start in range(0, data.__len__(), 255):
+        chunk = data[start: start + 255]
+        blocks.append(chunk.__len__())
+        blocks += chunk
+    blocks.append(0)
+    return bytes(blocks)
+
+
+class GIFWriter:
+
+    # the frames after the first one only cover what changed
+    DELTA = True
+
+    def __init__(self, path, width, height, fps):
+        self.file = open(path, 'wb')
+        # the delay of the frames is in hundredths of a second, and most viewers don't go below 2
+        self.delay = max(2, round(100 / fps))
+        # the last image is only written when the next one arrives, since its delay can still grow
+        self.pending = None
+        self.pendingDelay = 0
+        # header and logical screen descriptor, with a global colour table of 4 colours
+        self.file.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0xf1, 0, 0))
+        self.file.write(bytes(component for colour in PALETTE for component in colour))
+        # the NETSCAPE2.0 extension, looping forever
+        self.file.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', 0) + b'\x00')
+
+    # the image descriptor and the compressed pixels, or None for an unchanged frame (called by the encoder thread)
+    @staticmethod
+    def encode(frame):
+        _, top, left, pixels = frame
+        if pixels is None:
+            return None
+        descriptor = b'\x2c' + struct.pack('<HHHHB', left, top, pixels.shape[1], pixels.shape[0], 0)
+        return descriptor + bytes([MIN_CODE_SIZE]) + subBlocks(lzwEncode(pixels.tobytes(), MIN_CODE_SIZE))
+
+    def write(self, generation, image):
+        if image is None:
+            self.pendingDelay += self.delay
+            return
+        self.flush()
+        self.pending = image
+        self.pendingDelay = self.delay
+
+    def flush(self):
+        if self.pending is None:
+            return
+        # graphic control extension: the image is left in place (disposal 1) for the next ones to be drawn over it
+        self.file.write(b'\x21\xf9\x04' + struct.pack('<BHBB', 1 << 2, min(self.pendingDelay, 0xffff), 0, 0))
+        self.file.write(self.pending)
+        self.pending = None
+
+    def close(self):
+        self.flush()
+        self.file.write(b'\x3b')
+        self.file.close()
+
+
+"""
+    PNG encoding: every frame is a whole image with a palette, with the rows deflated by zlib (without filtering,
+    which doesn't help on images made of large squares of a few colours).
+"""
+
+
+def pngChunk(kind, data):
+    return struct.pack('>I', data.__len__()) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+class PNGSequenceWriter:
+
+    DELTA = False
+
+    def __init__(self, directory, width, height, fps):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        # an unchanged frame is the previous file again
+        self.previous = None
+
+    @staticmethod
+    def encode(frame):
+        _, _, _, pixels = frame
+        if pixels is None:
+            return None
+        # each row starts with its filter type (0, none)
+        rows = np.zeros((pixels.shape[0], pixels.shape[1] + 1), dtype=np.uint8)
+        rows[:, 1:] = pixels
+        header = struct.pack('>IIBBBBB', pixels.shape[1], pixels.shape[0], 8, 3, 0, 0, 0)
+        palette = bytes(component for colour in PALETTE for component in colour)
+        return (b'\x89PNG\r\n\x1a\n' + pngChunk(b'IHDR', header) + pngChunk(b'PLTE', palette) +
+                pngChunk(b'IDAT', zlib.compress(rows.tobytes(), 6)) + pngChunk(b'IEND', b''))
+
+    def write(self, generation, image):
+        if image is None:
+            image = self.previous
+        with open(os.path.join(self.directory, 'frame-{:07d}.png'.format(generation)), 'wb') as f:
+            f.write(image)
+        self.previous = image
+
+    def close(self):
+        pass
+
+
+def writerClass(path):
+    if path.endswith('.gif'):
+        return GIFWriter
+    return PNGSequenceWriter
+
+
+def record(model, writer, generations, every, cellSize, queueSize=QUEUE_SIZE):
+    frames = prefetch(renderFrames(simulate(model, generations, every), cellSize, writer.DELTA), queueSize)
+    images = prefetch(((frame[0], writer.encode(frame)) for frame in frames), queueSize)
+    count = 0
+    for generation, image in images:
+        writer.write(generation, image)
+        count += 1
+        yield count
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description="Record a run of the Game of Life as an animated GIF or PNG files.")
+    parser.add_argument('pattern', help='name of a known pattern, or path of a .rle, .lif, .cells or .snap file')
+    parser.add_argument('--output', required=True,
+                        help='the .gif file, or the directory of the PNG files (frame-<generation>.png)')
+    parser.add_argument('--rows', type=int, default=40, help='number of rows of the grid')
+    parser.add_argument('--cols', type=int, default=50, help='number of columns of the grid')
+    parser.add_argument('--generations', type=int, default=100, help='number of generations to record')
+    parser.add_argument('--every', type=int, default=1, metavar='N', help='record one generation every N')
+    parser.add_argument('--cell-size', type=int, default=4, help='pixels per cell')
+    parser.add_argument('--fps', type=float, default=10, help='frames per second of the GIF')
+    parser.add_argument('--position', type=int, nargs=2, metavar=('ROW', 'COL'),
+                        help='top-left corner of the pattern (default: the one in patterns.json, or the centre)')
+    parser.add_argument('--backend', choices=list(GRID_BACKENDS.keys()), default='dense')
+    parser.add_argument('--stepping', choices=STEPPING_MODES, default='box')
+    parser.add_argument('--topology', choices=TOPOLOGIES, default='bounded',
+                        help="borders of the grid: 'torus' wraps around, 'plane' is infinite (its first rows x cols "
+                             "cells are recorded)")
+    parser.add_argument('--rule', help="rule in B/S notation, or the name of a known rule (default: Conway's B3/S23)")
+    args = parser.parse_args(argv)
+    if args.every < 1 or args.cell_size < 1 or args.fps <= 0:
+        parser.error('--every, --cell-size and --fps must be positive')
+    return args
+
+
+def main(argv=None):
+    args = parseArguments(argv)
+    try:
+        model = createModel(args)
+        width = model.numCols * args.cell_size
+        height = model.numRows * args.cell_size
+        Writer = writerClass(args.output)
+        if Writer is GIFWriter and max(width, height) > 0xffff:
+            raise ValueError('the GIF would be larger than 65535 pixels')
+        writer = Writer(args.output, width, height, args.fps)
+
+        start = time.perf_counter()
+        count = 0
+        try:
+            for count in record(model, writer, args.generations, args.every, args.cell_size):
+                if count % 100 == 0:
+                    print('{} frames ({:.1f} s)'.format(count, time.perf_counter() - start), file=sys.stderr)
+        finally:
+            writer.close()
+    except (OSError, ValueError, PatternTooLargeError) as e:
+        print('Error: {}'.format(e), file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print('{} frames of {}x{} pixels in {:.3f} s ({:.1f} frames/s)'.format(
+        count, width, height, elapsed, count / elapsed if elapsed > 0 else float('inf')))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,5 @@
-from PyQt5.QtWidgets import QSlider
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QSlider, QLabel
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QMouseEvent
 
 """
@@ -21,3 +21,82 @@ class FPSSlider(QSlider):
 
     def valueChanged(self, value: int):
         self.startButton.setFps(value)
+
+
+"""
+    The HistorySlider scrubs through the generations kept by the Model history: the left end is the oldest one, the
+    handle is the current one and the positions on its right are the generations that have been rewound. Dragging
+    the handle rewinds (or replays) the game as it moves, without computing anything again.
+"""
+class HistorySlider(QSlider):
+
+    def __init__(self, controller):
+        super().__init__(Qt.Horizontal)
+        self.controller = controller
+        self.setFixedWidth(400)
+        self.setToolTip('History')
+        self.valueChanged.connect(self.scrub)
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(200)
+        self.refresh()
+
+    def refresh(self):
+        if self.isSliderDown():
+            return
+        past, future = self.controller.historyRange()
+        # the range is updated without scrubbing the game
+        self.blockSignals(True)
+        self.setRange(0, past + future)
+        self.setValue(past)
+        self.blockSignals(False)
+
+    def scrub(self, value):
+        past, _ = self.controller.historyRange()
+        self.controller.scrub(value - past)
+
+
+"""
+    RateLabel shows the generations per second actually computed by the background worker, which can be lower than
+    the FPS requested with the FPSSlider when a generation takes too long.
+"""
+class RateLabel(QLabel):
+
+    def __init__(self, controller):
+        super().__init__()
+        self.controller = controller
+        self.setFixedWidth(140)
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+        self.refresh()
+
+    def refresh(self):
+        self.setText('Actual: {:.1f} gen/s'.format(self.controller.achievedRate()))
+
+
+"""
+    CycleLabel tells when the game has settled into a still life or an oscillator, so that the user knows there's
+    nothing new to wait for: the following generations are replayed instead of computed, and the Jump button skips
+    any number of them at once. The cycles are only looked for while the game is set to pause on them, so the label
+    stays empty otherwise.
+"""
+class CycleLabel(QLabel):
+
+    def __init__(self, controller):
+        super().__init__()
+        self.controller = controller
+        self.setFixedWidth(260)
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+        self.refresh()
+
+    def refresh(self):
+        cycle = self.controller.cycleStatus()
+        if cycle is None:
+            self.setText('')
+        elif cycle[1] == 1:
+            self.setText('Still life since generation {}'.format(cycle[0]))
+        else:
+            self.setText('Period {} cycle since generation {}'.format(cycle[1], cycle[0]))
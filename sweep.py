@@ -0,0 +1,421 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+
+from collections import Counter, deque
+
+from life import Model, TOPOLOGIES
+from life.patterns import patternToPositions
+from life.rules import parseRule
+
+"""
+    Batch runner for random soups: it runs every combination of rule, grid size, density and seed of a sweep, each
+    one until the board settles into a cycle (or up to a maximum number of generations), and takes a census of what
+    is left. For example:
+
+        python sweep.py --sizes 64 128 --densities 0.2 0.35 0.5 --runs 1000 --output census.csv
+
+    or, with the sweep described by a JSON file with the same keys of the options (sizes, densities, seeds, rules,
+    generations, topology):
+
+        python sweep.py --spec sweep.json --output census.csv --workers 8
+
+    The runs are independent, so they're spread over a pool of worker processes. Every run gives back a row of
+    statistics (final population, generation where the cycle started and its period, number of objects and their
+    census), which is written to the output as soon as it arrives, in any order: the rows are never held in memory,
+    so a sweep can be as long as needed, and an interrupted one can be continued with --resume, which skips the runs
+    already in the output. The output is a CSV file, JSON lines if its name ends with '.jsonl', or Parquet (written a
+    row group at a time) if it ends with '.parquet' and pyarrow is installed.
+    At the end, the runs are aggregated by rule, size and density (the totals are kept while the rows stream by) and
+    printed as JSON lines.
+"""
+
+FIELDS = ['rule', 'size', 'density', 'seed', 'initial_population', 'final_population', 'generations',
+          'stabilised_at', 'period', 'objects', 'census', 'seconds']
+PARQUET_BATCH = 1000
+
+"""
+    The census: the final board is split into objects (groups of living cells connected through their eight
+    neighbours) and each object is recognised by its shape, regardless of its rotation or reflection. The shapes not
+    in KNOWN_OBJECTS are counted as 'other'. Oscillators whose phases are made of separate pieces (e.g. the toad) are
+    counted as their pieces, and so are the objects that cross the borders of a torus.
+"""
+
+# (name, rows) of the known shapes: the two phases of the glider are different shapes with the same name
+KNOWN_OBJECTS = [
+    ('block', ['11', '11']),
+    ('beehive', ['0110', '1001', '0110']),
+    ('loaf', ['0110', '1001', '0101', '0010']),
+    ('boat', ['110', '101', '010']),
+    ('ship', ['110', '101', '011']),
+    ('tub', ['010', '101', '010']),
+    ('pond', ['0110', '1001', '1001', '0110']),
+    ('blinker', ['111']),
+    ('glider', ['010', '001', '111']),
+    ('glider', ['101', '011', '010']),
+]
+
+
+# the same representation for all the rotations and reflections of a shape (an array of positions)
+def canonicalShape(positions):
+    forms = []
+    for transposed in (False, True):
+        shape = positions[:, ::-1] if transposed else positions
+        for flipRows, flipCols in itertools.product((1, -1), repeat=2):
+            oriented = shape * (flipRows, flipCols)
+            oriented = oriented - oriented.min(axis=0)
+            forms.append(tuple(sorted(map(tuple, oriented.tolist()))))
+    return min(forms)
+
+
+SHAPE_NAMES = {canonicalShape(patternToPositions([[int(ch) for ch in row] for row in rows])): name
+               for name, rows in KNOWN_OBJECTS}
+
+
+def findObjects(positions):
+    unvisited = set(positions)
+    objects = []
+    while unvisited:
+        seed = unvisited.pop()
+        cells = [seed]
+        queue = deque([seed])
+        while queue:
+            row, col = queue.popleft()
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    neighbour = (row + dr, col + dc)
+                    if neighbour in unvisited:
+                        unvisited.remove(neighbour)
+                        cells.append(neighbour)
+                        queue.append(neighbour)
+        objects.append(np.array(cells, dtype=np.int64))
+    return objects
+
+
+def census(positions):
+    objects = findObjects(positions)
+    names = Counter(SHAPE_NAMES.get(canonicalShape(cells), 'other') for cells in objects)
+    return objects.__len__(), names
+
+
+def formatCensus(names):
+    return ';'.join('{}:{}'.format(name, count) for name, count in names.most_common())
+
+
+def parseCensus(text):
+    return Counter({name: int(count) for name, count in (item.split(':') for item in text.split(';') if item)})
+
+
+"""
+    A single run, executed by a worker process. The Model keeps no history (nothing is rewound here), while its
+    cycle detection tells when the board has settled.
+"""
+
+
+def runSoup(task):
+    rule, size, density, seed, generations, topology, maxPeriod = task
+    start = time.perf_counter()
+    model = Model(1, size, size, topology=topology, rule=rule, historySize=0, maxPeriod=maxPeriod)
+    rng = np.random.default_rng(seed)
+    model.placePositions(np.argwhere(rng.random((size, size)) < density), 0, 0)
+    initialPopulation = model.population
+    while model.cycle is None and model.generation < generations:
+        model.updateCells()
+    numObjects, names = census(map(tuple, model.livePositions().tolist()))
+    return {'rule': rule, 'size': size, 'density': density, 'seed': seed,
+            'initial_population': initialPopulation, 'final_population': model.population,
+            'generations': model.generation,
+            'stabilised_at': model.cycle[0] if model.cycle is not None else None,
+            'period': model.cycle[1] if model.cycle is not None else None,
+            'objects': numObjects, 'census': formatCensus(names), 'seconds': time.perf_counter() - start}
+
+
+def runKey(row):
+    return row['rule'], row['size'], float(row['density']), row['seed']
+
+
+"""
+    The writers of the results: they write a row at a time (Parquet needs a batch of rows for each row group), and
+    can read back the rows of an existing output, one at a time. A sweep that was killed can leave a partial row at
+    the end of a text output: it's not read back (so the run is done again), and it's cut off before appending.
+"""
+
+
+# the lines of a text file that are complete, i.e. end with a newline
+def completeLines(f):
+    for line in f:
+        if line.endswith('\n'):
+            yield line
+
+
+# cuts the file after its last newline
+def dropPartialLine(path):
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(position - 65536, 0)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b'\n')
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            f.truncate(position)
+
+
+class CSVWriter:
+
+    def __init__(self, path, append):
+        exists = append and os.path.exists(path)
+        if exists:
+            dropPartialLine(path)
+        self.file = open(path, 'a' if exists else 'w', newline='')
+        self.writer = csv.DictWriter(self.file, FIELDS)
+        if not exists:
+            self.writer.writeheader()
+
+    @staticmethod
+    def readRows(path):
+        # CSV has no types: the empty values are the missing ones, and the numbers are converted back
+        with open(path, newline='') as f:
+            for row in csv.DictReader(completeLines(f)):
+                # a row with missing (or extra) fields is broken
+                if any(row.get(key) is None for key in FIELDS) or None in row:
+                    continue
+                try:
+                    for key in FIELDS:
+                        if key in ('rule', 'census'):
+                            continue
+                        if row[key] == '':
+                            row[key] = None
+                        elif key in ('density', 'seconds'):
+                            row[key] = float(row[key])
+                        else:
+                            row[key] = int(row[key])
+                except ValueError:
+                    continue
+                yield row
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JSONLinesWriter:
+
+    def __init__(self, path, append):
+        if append and os.path.exists(path):
+            dropPartialLine(path)
+        self.file = open(path, 'a' if append else 'w')
+
+    @staticmethod
+    def readRows(path):
+        with open(path) as f:
+            for line in completeLines(f):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                # like in a CSV output, a row with missing fields is broken
+                if not isinstance(row, dict) or any(key not in row for key in FIELDS):
+                    continue
+                yield row
+
+    def write(self, row):
+        self.file.write(json.dumps(row) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+
+    def __init__(self, path, append):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([('rule', pa.string()), ('size', pa.int64()), ('density', pa.float64()),
+                                 ('seed', pa.int64()), ('initial_population', pa.int64()),
+                                 ('final_population', pa.int64()), ('generations', pa.int64()),
+                                 ('stabilised_at', pa.int64()), ('period', pa.int64()), ('objects', pa.int64()),
+                                 ('census', pa.string()), ('seconds', pa.float64())])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.rows = []
+
+    @staticmethod
+    def readRows(path):
+        raise ValueError('Parquet files cannot be appended to: use a new output file')
+
+    def write(self, row):
+        self.rows.append(row)
+        if self.rows.__len__() >= PARQUET_BATCH:
+            self.flush()
+
+    def flush(self):
+        if self.rows.__len__() != 0:
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def writerClass(path):
+    if path.endswith('.parquet'):
+        return ParquetWriter
+    if path.endswith('.jsonl'):
+        return JSONLinesWriter
+    return CSVWriter
+
+
+"""
+    The aggregates of a group of runs: only the totals are kept, so their size doesn't depend on the number of runs.
+"""
+
+
+class Aggregate:
+
+    def __init__(self):
+        self.runs = 0
+        self.stabilised = 0
+        self.finalPopulation = 0
+        self.stabilisedAt = 0
+        self.periods = Counter()
+        self.objects = 0
+        self.census = Counter()
+        self.seconds = 0
+
+    def add(self, row):
+        self.runs += 1
+        self.finalPopulation += row['final_population']
+        if row['stabilised_at'] is not None:
+            self.stabilised += 1
+            self.stabilisedAt += row['stabilised_at']
+            self.periods[row['period']] += 1
+        self.objects += row['objects']
+        self.census.update(parseCensus(row['census']))
+        self.seconds += row['seconds']
+
+    def summary(self, key):
+        return {'rule': key[0], 'size': key[1], 'density': key[2], 'runs': self.runs,
+                'stabilised': self.stabilised,
+                'mean_final_population': self.finalPopulation / self.runs,
+                'mean_stabilised_at': self.stabilisedAt / self.stabilised if self.stabilised > 0 else None,
+                'periods': {str(period): count for period, count in sorted(self.periods.items())},
+                'mean_objects': self.objects / self.runs,
+                'census': dict(self.census.most_common()),
+                'seconds': self.seconds}
+
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(description='Run a sweep of random soups and take a census of the results.')
+    parser.add_argument('--spec', help='JSON file describing the sweep (its keys override the options below)')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64], help='edges of the square grids')
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.35],
+                        help='probabilities of a living cell in the soups')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0], help='random seeds of the soups')
+    parser.add_argument('--runs', type=int, help='use the seeds 0, 1, ..., RUNS - 1 instead of --seeds')
+    parser.add_argument('--rules', nargs='+', default=['B3/S23'], help='rules in B/S notation, or their names')
+    parser.add_argument('--generations', type=int, default=5000,
+                        help='maximum number of generations of a run that doesn\'t settle')
+    parser.add_argument('--topology', choices=TOPOLOGIES, default='bounded')
+    parser.add_argument('--max-period', type=int, default=1000, help='longest cycle that can be detected')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--output', required=True, help='file where the runs are written (.csv, .jsonl, .parquet)')
+    parser.add_argument('--resume', action='store_true', help='skip the runs already in the output and append')
+    parser.add_argument('--summary', help='file where the aggregates are written, besides the standard output')
+    args = parser.parse_args(argv)
+    if args.spec is not None:
+        with open(args.spec) as f:
+            spec = json.load(f)
+        for key, value in spec.items():
+            key = key.replace('-', '_')
+            if not hasattr(args, key):
+                parser.error('unknown key in the spec: {}'.format(key))
+            setattr(args, key, value)
+    if args.runs is not None:
+        args.seeds = list(range(args.runs))
+    return args
+
+
+def tasks(args, done):
+    for rule, size, density, seed in itertools.product(args.rules, args.sizes, args.densities, args.seeds):
+        if (rule, size, float(density), seed) not in done:
+            yield rule, size, density, seed, args.generations, args.topology, args.max_period
+
+
+def main(argv=None):
+    args = parseArguments(argv)
+    try:
+        # the rules are checked (and written the same way in every row) before starting the workers
+        args.rules = [parseRule(rule).notation() for rule in args.rules]
+    except ValueError as e:
+        print('Error: {}'.format(e), file=sys.stderr)
+        return 1
+    Writer = writerClass(args.output)
+    # the runs already in the output are skipped, but they're part of the aggregates
+    done = set()
+    aggregates = {}
+    try:
+        if args.resume and os.path.exists(args.output):
+            for row in Writer.readRows(args.output):
+                done.add(runKey(row))
+                aggregates.setdefault((row['rule'], row['size'], row['density']), Aggregate()).add(row)
+        writer = Writer(args.output, args.resume)
+    except (ImportError, OSError, ValueError) as e:
+        print('Error: cannot write {}: {}'.format(args.output, e), file=sys.stderr)
+        return 1
+    total = args.rules.__len__() * args.sizes.__len__() * args.densities.__len__() * args.seeds.__len__()
+
+    if args.workers > 1:
+        pool = multiprocessing.Pool(args.workers)
+        # the runs take different times, so they're handed out one at a time and collected in completion order
+        results = pool.imap_unordered(runSoup, tasks(args, done))
+    else:
+        pool = None
+        results = map(runSoup, tasks(args, done))
+    start = time.perf_counter()
+    count = done.__len__()
+    try:
+        for row in results:
+            writer.write(row)
+            aggregates.setdefault((row['rule'], row['size'], row['density']), Aggregate()).add(row)
+            count += 1
+            if count % 100 == 0:
+                print('{}/{} runs ({:.1f} s)'.format(count, total, time.perf_counter() - start), file=sys.stderr)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    summaryFile = open(args.summary, 'w') if args.summary is not None else None
+    for key in sorted(aggregates):
+        line = json.dumps(aggregates[key].summary(key))
+        print(line)
+        if summaryFile is not None:
+            summaryFile.write(line + '\n')
+    if summaryFile is not None:
+        summaryFile.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
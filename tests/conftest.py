@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# the GUI tests run without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+# the pixmap of a painter canvas can't be destroyed while it's being painted, which crashes the interpreter when the
+# canvases are collected: their painters are ended after each test
+@pytest.fixture(autouse=True)
+def endPainters():
+    yield
+    from PyQt5.QtWidgets import QApplication
+    from canvas import CanvasView
+    if QApplication.instance() is None:
+        return
+    for widget in QApplication.allWidgets():
+        if isinstance(widget, CanvasView) and widget.painter.isActive():
+            widget.painter.end()
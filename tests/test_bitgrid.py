@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from life.model import Model
+from life.rules import parseRule
+
+
+def livePositions(model):
+    return set(map(tuple, model.livePositions().tolist()))
+
+
+def soup(numRows, numCols, seed):
+    rng = np.random.default_rng(seed)
+    return np.argwhere(rng.random((numRows, numCols)) < 0.3)
+
+
+# the grids are taller than a band of the packed step, and their width isn't a multiple of a word
+@pytest.mark.parametrize('topology', ['bounded', 'torus'])
+@pytest.mark.parametrize('rule', ['B3/S23', 'B36/S23'])
+@pytest.mark.parametrize('stepping', ['box', 'frontier'])
+def test_packed_matches_dense(topology, rule, stepping):
+    models = [Model(1, 130, 300, backend=backend, stepping=stepping, topology=topology, rule=parseRule(rule))
+              for backend in ('dense', 'packed')]
+    for model in models:
+        model.placePositions(soup(300, 130, 0), 0, 0)
+    for _ in range(20):
+        changes = [model.updateCells()[1] for model in models]
+        assert [len(births) for births, _ in changes] == [len(changes[0][0])] * 2
+        assert [len(deaths) for _, deaths in changes] == [len(changes[0][1])] * 2
+        assert livePositions(models[0]) == livePositions(models[1])
+        assert models[0].population == models[1].population
+        assert models[0].liveBounds() == models[1].liveBounds()
+
+
+def test_packed_history():
+    model = Model(1, 130, 300, backend='packed')
+    model.placePositions(soup(300, 130, 1), 0, 0)
+    states = []
+    for _ in range(10):
+        states.append(livePositions(model))
+        model.updateCells()
+    model.scrub(-10)
+    assert livePositions(model) == states[0]
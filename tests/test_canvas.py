@@ -0,0 +1,78 @@
+import time
+
+import numpy as np
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QPixmap
+
+from canvas import CanvasView
+from MVC import Controller, Model
+
+GLIDER = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+
+
+def makeController(edge=10, rows=20, cols=20):
+    model = Model(edge, edge * cols + 1, edge * rows + 1)
+    pixmap = QPixmap(edge * cols + 1, edge * rows + 1)
+    pixmap.fill(Qt.white)
+    canvas = CanvasView(pixmap, model)
+    canvas.drawGrid()
+    controller = Controller(model, canvas, None)
+    canvas.addController(controller)
+    return controller
+
+
+# the colours of the squares on the canvas, as sets of positions
+def shownSquares(controller):
+    image = controller.canvasView.pixmap().toImage()
+    edge = controller.model.squareEdge
+    green, red = set(), set()
+    for row in range(controller.model.numRows):
+        for col in range(controller.model.numCols):
+            colour = image.pixelColor(col * edge + edge // 2, row * edge + edge // 2)
+            if colour == QColor(Qt.green):
+                green.add((row, col))
+            elif colour == QColor(Qt.red):
+                red.add((row, col))
+    return green, red
+
+
+def livePositions(model):
+    return set(map(tuple, model.livePositions().tolist()))
+
+
+def test_history_after_stop(app):
+    controller = makeController()
+    canvas = controller.canvasView
+    controller.model.placePattern(GLIDER, 2, 2)
+    controller.startSimulation(100)
+    deadline = time.perf_counter() + 5
+    while controller.worker.generation < 3 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    controller.stopSimulation()
+    canvas.setHistory()
+    for _ in range(6):
+        controller.updateCells()
+    canvas.setHistory()
+    app.processEvents()
+    assert shownSquares(controller) == (livePositions(controller.model), set())
+
+
+def test_history_after_stop_matches_the_model(app):
+    controller = makeController()
+    canvas = controller.canvasView
+    controller.model.placePattern(GLIDER, 2, 2)
+    canvas.setHistory()
+    controller.startSimulation(100)
+    deadline = time.perf_counter() + 5
+    while controller.worker.generation < 5 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    controller.showLatestSnapshot()
+    controller.stopSimulation()
+    app.processEvents()
+    model = controller.model
+    _, oldCells = model.stateArrays()
+    old = set(map(tuple, np.argwhere(oldCells).tolist()))
+    green, red = shownSquares(controller)
+    assert red == old
+    assert green == livePositions(model) - old
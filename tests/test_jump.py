@@ -0,0 +1,32 @@
+import pytest
+
+from life.model import Model
+
+GLIDER = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+ACORN = [[0, 1, 0, 0, 0, 0, 0], [0, 0, 0, 1, 0, 0, 0], [1, 1, 0, 0, 1, 1, 1]]
+
+
+def livePositions(model):
+    return set(map(tuple, model.livePositions().tolist()))
+
+
+@pytest.mark.parametrize('topology', ['bounded', 'torus', 'plane'])
+@pytest.mark.parametrize('pattern', [GLIDER, ACORN])
+@pytest.mark.parametrize('generations', [1, 64, 300])
+def test_jump_matches_steps(topology, pattern, generations):
+    stepped = Model(10, 500, 400, topology=topology)
+    jumped = Model(10, 500, 400, topology=topology)
+    for model in (stepped, jumped):
+        model.placePattern(pattern, 20, 20)
+    for _ in range(generations):
+        stepped.updateCells()
+    jumped.jumpGenerations(generations)
+    assert jumped.generation == stepped.generation
+    assert livePositions(jumped) == livePositions(stepped)
+
+
+def test_jump_stops_after_max_steps():
+    model = Model(10, 500, 400, topology='torus')
+    model.placePattern(ACORN, 20, 20)
+    model.jumpGenerations(10 ** 9, maxSteps=50)
+    assert model.generation == 50
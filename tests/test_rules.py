@@ -0,0 +1,28 @@
+import re
+
+import pytest
+
+from life.rules import CONWAY, RULES, Rule, parseRule
+
+
+@pytest.mark.parametrize('text, rule', [
+    ('B3/S23', CONWAY),
+    ('b3/s23', CONWAY),
+    ('S23/B3', CONWAY),
+    ('23/3', CONWAY),
+    ('B 3 / S 23', CONWAY),
+    ('HighLife', RULES['HighLife']),
+    ('B2/S/C3', Rule([2], [], 3)),
+    ('/2/3', Rule([2], [], 3)),
+    ('B2/S345/G4', Rule([2], [3, 4, 5], 4)),
+])
+def test_parse(text, rule):
+    assert parseRule(text) == rule
+
+
+# the whole text has to be a rule: 'bogus' isn't B followed by the counts 'ogus'
+@pytest.mark.parametrize('text', ['bogus', 'sogus', '', 'B3', 'B3/S23/C', 'x/y', 'B3/S23/3', 'B09/S23', 'B3/S9',
+                                  '23/3/1'])
+def test_invalid(text):
+    with pytest.raises(ValueError, match=re.escape(repr(text))):
+        parseRule(text)
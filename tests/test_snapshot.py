@@ -0,0 +1,42 @@
+import pytest
+
+from life.snapshot import writeSnapshot
+from test_canvas import GLIDER, livePositions, makeController
+
+
+@pytest.fixture
+def controller(app, monkeypatch):
+    controller = makeController()
+    controller.errors = []
+    monkeypatch.setattr(controller, 'showErrorPopup', controller.errors.append)
+    controller.model.placePattern(GLIDER, 2, 2)
+    return controller
+
+
+def writeLargeSnapshot(path):
+    large = makeController(rows=40, cols=40)
+    large.model.placePattern(GLIDER, 30, 30)
+    writeSnapshot(path, large.model)
+
+
+@pytest.mark.parametrize('content', [None, b'', b'not a snapshot', 'large'])
+def test_failed_load_keeps_the_board(controller, tmp_path, content):
+    path = tmp_path / 'board.gol'
+    if content == 'large':
+        writeLargeSnapshot(str(path))
+    elif content is not None:
+        path.write_bytes(content)
+    before = livePositions(controller.model)
+    controller.loadSnapshot(str(path))
+    assert controller.errors.__len__() == 1
+    assert controller.model.population == 5
+    assert livePositions(controller.model) == before
+
+
+def test_load(controller, tmp_path):
+    path = str(tmp_path / 'board.gol')
+    writeSnapshot(path, controller.model)
+    controller.model.clearAll()
+    controller.loadSnapshot(path)
+    assert controller.errors == []
+    assert livePositions(controller.model) == {(2, 3), (3, 4), (4, 2), (4, 3), (4, 4)}
@@ -0,0 +1,28 @@
+import json
+
+import sweep
+
+ARGUMENTS = ['--sizes', '16', '--seeds', '0', '1', '--generations', '200', '--workers', '1']
+
+
+def readLines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_unwritable_output(tmp_path, capsys):
+    output = tmp_path / 'missing' / 'runs.csv'
+    assert sweep.main(ARGUMENTS + ['--output', str(output)]) == 1
+    assert 'cannot write' in capsys.readouterr().err
+
+
+# a row without some of the fields is run again instead of breaking the resumed sweep
+def test_resume_skips_incomplete_rows(tmp_path):
+    output = tmp_path / 'runs.jsonl'
+    assert sweep.main(ARGUMENTS + ['--output', str(output)]) == 0
+    rows = readLines(output)
+    del rows[1]['census']
+    output.write_text(''.join(json.dumps(row) + '\n' for row in rows))
+    assert sweep.main(ARGUMENTS + ['--output', str(output), '--resume']) == 0
+    seeds = [row['seed'] for row in readLines(output) if 'census' in row]
+    assert sorted(seeds) == [0, 1]
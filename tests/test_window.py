@@ -0,0 +1,46 @@
+import pytest
+
+from PyQt5.QtCore import QEvent
+
+from main import parseArguments
+from window import MainWindow
+
+GLIDER = [[0, 1, 0], [0, 0, 1], [1, 1, 1]]
+
+
+def livePositions(model):
+    return set(map(tuple, model.livePositions().tolist()))
+
+
+# a glider heading out of the bottom right corner: it turns into a block on the bounded board, it comes back from the
+# top left one on the torus, and it goes on beyond the board on the plane
+@pytest.mark.parametrize('renderer', ['painter', 'image', 'viewport'])
+@pytest.mark.parametrize('topology', ['bounded', 'torus', 'plane'])
+def test_topology(app, renderer, topology):
+    args = parseArguments(['--rows', '20', '--cols', '20', '--renderer', renderer, '--topology', topology])
+    window = MainWindow(args.edge, args.rows, args.cols, renderer=args.renderer, topology=args.topology)
+    controller = window.controller
+    model = controller.model
+    assert model.topology == topology
+    model.placePattern(GLIDER, 15, 15)
+    for _ in range(40):
+        controller.updateCells()
+    app.processEvents()
+    positions = livePositions(model)
+    if topology == 'bounded':
+        assert positions == {(18, 18), (18, 19), (19, 18), (19, 19)}
+    elif topology == 'torus':
+        assert positions == {(row % 20, col % 20) for row, col in glider(25, 25)}
+    else:
+        assert positions == glider(25, 25)
+    window.close()
+    if renderer == 'painter':
+        # the pixmap of the painter canvas can't be destroyed while it's being painted (see benchmark.py)
+        controller.canvasView.painter.end()
+    window.deleteLater()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+# the glider after 40 generations, starting from (15, 15)
+def glider(row, col):
+    return {(row + r, col + c) for r, line in enumerate(GLIDER) for c, cell in enumerate(line) if cell}
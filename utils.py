@@ -1,6 +1,8 @@
 from PyQt5.QtWidgets import QLabel
 
-from buttons import StartButton, HistoryCheckBox, StopButton, StepButton, ClearButton
+from buttons import StartButton, HistoryCheckBox, StopButton, StepButton, ClearButton, JumpButton, JumpSpinBox, \
+    SaveButton, OpenButton, BackButton, PauseOnCycleCheckBox, ProfilerCheckBox, ExportTraceButton, RuleBox
+from overlay import ProfilerOverlay
 from slider import FPSSlider
 
 
@@ -9,11 +11,21 @@ def createButtonsForGUI(canvas, knownPatternBox, controller):
     start = StartButton(controller)
     historyCheckBox = HistoryCheckBox(canvas)
     buttons.append(start)
-    buttons.append(StopButton(start.timer))
+    buttons.append(StopButton(controller, start.timer))
+    buttons.append(BackButton(controller))
     buttons.append(StepButton(controller))
+    jumpSpinBox = JumpSpinBox()
+    buttons.append(jumpSpinBox)
+    buttons.append(JumpButton(controller, jumpSpinBox))
     buttons.append(ClearButton(controller))
+    buttons.append(SaveButton(controller))
+    buttons.append(OpenButton(controller))
     buttons.append(knownPatternBox)
+    buttons.append(RuleBox(controller))
     buttons.append(historyCheckBox)
+    buttons.append(PauseOnCycleCheckBox(controller))
+    buttons.append(ProfilerCheckBox(ProfilerOverlay(canvas)))
+    buttons.append(ExportTraceButton())
 
     fpsSlider = FPSSlider(start)
 
@@ -0,0 +1,313 @@
+import math
+import numpy as np
+
+from PyQt5.QtCore import Qt, QRectF, QSize, QTimer
+from PyQt5.QtGui import QMouseEvent, QPainter, QPen, QImage, QColor
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+
+from imagecanvas import ALIVE, OLD, DYING, GRID_MIN_EDGE
+from life.profiler import profiler
+
+"""
+    ViewportCanvasView shows a window on a board of any size: the board is no longer drawn at a fixed square edge
+    into a pixmap as large as itself, but the widget takes the space it's given and shows the part of the board
+    under the viewport, which can be zoomed (mouse wheel, around the cursor) and panned (dragging with the right or
+    middle button). The Model doesn't know anything about the widget size.
+    Only the cells inside the viewport are read from the grid (through window(), also cropped to the bounding box of
+    the living cells) and written into a buffer shown as an indexed QImage, like the ImageCanvasView does for the
+    whole board. When zoomed out below one pixel per cell, the cells are reduced to one value per block of
+    lod x lod cells (a block is alive if any of its cells is), so the image is never larger than the widget; when
+    the viewport covers too many cells to read them all, only one row out of lod is sampled.
+    While the game runs in the background, the worker captures the visible cells itself (see captureCells()), so
+    that it never copies the whole board.
+"""
+
+MAX_ZOOM = 64
+# zoom factor of a wheel step
+ZOOM_STEP = 1.25
+# above this number of visible cells, the rows are sampled when zoomed out instead of being read in full
+MAX_READ_CELLS = 1 << 24
+
+
+# reduces the cells to one value for each block of blockRows x blockCols cells: the highest state in the block
+def reduceBlocks(cells, blockRows, blockCols):
+    if blockRows == 1 and blockCols == 1:
+        return cells
+    rows = -(-cells.shape[0] // blockRows) * blockRows
+    cols = -(-cells.shape[1] // blockCols) * blockCols
+    padded = np.zeros((rows, cols), dtype=np.uint8)
+    padded[:cells.shape[0], :cells.shape[1]] = cells
+    return padded.reshape(rows // blockRows, blockRows, cols // blockCols, blockCols).max(axis=(1, 3))
+
+
+class ViewportCanvasView(QWidget):
+
+    def __init__(self, model, zoom):
+        super().__init__()
+
+        self.model = model
+        self.controller = None
+
+        self.history = False
+
+        # pixels per cell (below 1 when zoomed out) and board position of the top-left corner of the widget
+        self.zoom = float(zoom)
+        self.originRow = 0.0
+        self.originCol = 0.0
+        # the last two frames as (rect, lod, cells), where rect is the (top, left, bottom, right) rectangle of the
+        # board covered by the cells, and lod the side of the block of cells behind each of them
+        self.current = None
+        self.previous = None
+        # the image reads from the buffer, which must outlive it
+        self.buffer = None
+        self.image = None
+        # the mouse position and origin when the panning started
+        self.panStart = None
+
+        self.view = (self.visibleRect(), self.levelOfDetail())
+        self.refreshPending = False
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumSize(200, 200)
+
+    def sizeHint(self):
+        return QSize(min(int(self.model.numCols * self.zoom) + 1, 1000),
+                     min(int(self.model.numRows * self.zoom) + 1, 700))
+
+    def addController(self, controller):
+        self.controller = controller
+
+    def setHistory(self):
+        self.history = not self.history
+        self.composeBuffer()
+        self.update()
+
+    """
+        Viewport geometry: widget pixels and board cells are related by the origin and the zoom. The board is
+        clipped to its size, except on the plane, which has no borders.
+    """
+
+    def cellAt(self, x, y):
+        return math.floor(self.originRow + y / self.zoom), math.floor(self.originCol + x / self.zoom)
+
+    def visibleRect(self):
+        top = math.floor(self.originRow)
+        left = math.floor(self.originCol)
+        bottom = math.ceil(self.originRow + self.height() / self.zoom)
+        right = math.ceil(self.originCol + self.width() / self.zoom)
+        if self.model.topology != 'plane':
+            top = max(top, 0)
+            left = max(left, 0)
+            bottom = max(min(bottom, self.model.numRows), top)
+            right = max(min(right, self.model.numCols), left)
+        return top, left, bottom, right
+
+    def levelOfDetail(self):
+        return max(1, math.ceil(1 / self.zoom - 1e-9))
+
+    def minZoom(self):
+        if self.model.topology == 'plane':
+            return 1 / 256
+        # zoomed out, the whole board fits in half of the widget
+        return min(1.0, 0.5 * min(self.width() / self.model.numCols, self.height() / self.model.numRows))
+
+    # keeps at least a part of the board in the viewport
+    def clampOrigin(self):
+        if self.model.topology == 'plane':
+            return
+        visibleRows = self.height() / self.zoom
+        visibleCols = self.width() / self.zoom
+        self.originRow = min(max(self.originRow, 1 - visibleRows), self.model.numRows - 1)
+        self.originCol = min(max(self.originCol, 1 - visibleCols), self.model.numCols - 1)
+
+    """
+        Reading the visible cells. The rectangle is cropped to the living cells (everything else is dead), aligned to
+        the blocks of the level of detail so that the blocks don't depend on the crop.
+    """
+
+    def readCells(self, rect, lod):
+        top, left, bottom, right = rect
+        cells = np.zeros((-(-(bottom - top) // lod), -(-(right - left) // lod)), dtype=np.uint8)
+        bounds = self.model.liveBounds()
+        if bounds is None:
+            return cells
+        cropTop = max(top, top + (bounds[0] - top) // lod * lod)
+        cropLeft = max(left, left + (bounds[1] - left) // lod * lod)
+        cropBottom = min(bottom, bounds[2])
+        cropRight = min(right, bounds[3])
+        if cropTop >= cropBottom or cropLeft >= cropRight:
+            return cells
+        grid = self.model.grid
+        if lod == 1 or (cropBottom - cropTop) * (cropRight - cropLeft) <= MAX_READ_CELLS:
+            reduced = reduceBlocks(grid.window(cropTop, cropLeft, cropBottom, cropRight), lod, lod)
+        else:
+            # the first row of each block stands for the whole block
+            rows = [grid.window(row, cropLeft, row + 1, cropRight) for row in range(cropTop, cropBottom, lod)]
+            reduced = reduceBlocks(np.concatenate(rows), 1, lod)
+        row = (cropTop - top) // lod
+        col = (cropLeft - left) // lod
+        cells[row: row + reduced.shape[0], col: col + reduced.shape[1]] = reduced[:cells.shape[0] - row,
+                                                                                  :cells.shape[1] - col]
+        return cells
+
+    # the viewport geometry is computed by the GUI thread, since the worker captures the cells with it
+    def updateView(self):
+        self.clampOrigin()
+        self.view = (self.visibleRect(), self.levelOfDetail())
+        self.scheduleRefresh()
+
+    # the visible cells as a frame (rect, lod, cells), read from the Model (the caller must hold its lock)
+    def captureCells(self):
+        rect, lod = self.view
+        return rect, lod, self.readCells(rect, lod)
+
+    """
+        Drawing: every change (a new generation, a click, panning, zooming, resizing) reads the visible cells again,
+        at most once per event loop iteration.
+    """
+
+    def drawGrid(self):
+        self.scheduleRefresh()
+
+    def drawRect(self, row, col, isNew):
+        self.scheduleRefresh()
+
+    def eraseRect(self, row, col):
+        self.scheduleRefresh()
+
+    def scheduleRefresh(self):
+        if not self.refreshPending:
+            self.refreshPending = True
+            QTimer.singleShot(0, self.refresh)
+
+    def refresh(self):
+        self.refreshPending = False
+        # while the game runs, the worker captures the new view with the next generation instead
+        if self.controller is not None and self.controller.worker is not None:
+            return
+        with self.model.lock:
+            self.current = self.captureCells()
+        self.composeBuffer()
+        self.requestRepaint()
+
+    def requestRepaint(self):
+        self.update()
+        profiler.count('repaint requests')
+
+    def drawGeneration(self, previous, change):
+        # the generation that was on screen becomes the previous one
+        self.previous = self.current
+        self.refresh()
+
+    def setShownCells(self, cells, oldCells):
+        self.previous = None
+        self.refresh()
+
+    def endSnapshots(self):
+        self.previous = None
+        self.refresh()
+
+    # the snapshots are frames captured by the worker with captureCells()
+    def drawSnapshot(self, frame):
+        self.previous = self.current
+        self.current = frame
+        if frame[:2] != self.view:
+            # the viewport moved since the worker captured the frame
+            self.scheduleRefresh()
+        self.composeBuffer()
+        self.requestRepaint()
+
+    def composeBuffer(self):
+        if self.current is None:
+            self.image = None
+            return
+        cells = self.current[2]
+        # QImage rows must be aligned to 4 bytes
+        stride = (cells.shape[1] + 3) // 4 * 4
+        self.buffer = np.zeros((cells.shape[0], stride), dtype=np.uint8)
+        view = self.buffer[:, :cells.shape[1]]
+        np.copyto(view, cells)
+        if self.model.rule.states > 2:
+            np.copyto(view, DYING, where=cells > ALIVE)
+        # the previous frame can only be shown if it covers the same cells
+        if self.history and self.previous is not None and self.previous[:2] == self.current[:2]:
+            np.copyto(view, OLD, where=self.previous[2] == ALIVE)
+        self.image = QImage(self.buffer.ctypes.data, cells.shape[1], cells.shape[0], stride, QImage.Format_Indexed8)
+        self.image.setColorTable([QColor(Qt.white).rgb(), QColor(Qt.green).rgb(), QColor(Qt.red).rgb(),
+                                  QColor(Qt.darkGreen).rgb()])
+
+    def clearAll(self):
+        self.current = None
+        self.previous = None
+        self.scheduleRefresh()
+
+    def paintEvent(self, ev):
+        start = profiler.start()
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.lightGray)
+        top, left, bottom, right = self.view[0]
+        board = QRectF((left - self.originCol) * self.zoom, (top - self.originRow) * self.zoom,
+                       (right - left) * self.zoom, (bottom - top) * self.zoom)
+        painter.fillRect(board, Qt.white)
+        if self.image is not None:
+            (top, left, bottom, right), lod, cells = self.current
+            painter.setClipRect(board)
+            painter.drawImage(QRectF((left - self.originCol) * self.zoom, (top - self.originRow) * self.zoom,
+                                     cells.shape[1] * lod * self.zoom, cells.shape[0] * lod * self.zoom), self.image)
+            painter.setClipping(False)
+        # only the visible grid lines are drawn, and only when the squares are large enough to see them
+        if self.zoom >= GRID_MIN_EDGE:
+            painter.setPen(QPen(Qt.black))
+            top, left, bottom, right = self.view[0]
+            for row in range(top, bottom + 1):
+                y = (row - self.originRow) * self.zoom
+                painter.drawLine(int(board.left()), int(y), int(board.right()), int(y))
+            for col in range(left, right + 1):
+                x = (col - self.originCol) * self.zoom
+                painter.drawLine(int(x), int(board.top()), int(x), int(board.bottom()))
+        painter.end()
+        profiler.stop('paint', start)
+        profiler.count('paint calls')
+
+    """
+        Mouse and wheel: the left button toggles the cell under the cursor, the right and middle buttons pan, and the
+        wheel zooms keeping the cell under the cursor in place.
+    """
+
+    def mousePressEvent(self, ev: QMouseEvent):
+        if ev.button() in (Qt.RightButton, Qt.MiddleButton):
+            self.panStart = (ev.pos(), self.originRow, self.originCol)
+            return
+        if self.controller is None or ev.button() != Qt.LeftButton:
+            return
+        row, col = self.cellAt(ev.pos().x(), ev.pos().y())
+        if self.model.topology == 'plane' or (0 <= row < self.model.numRows and 0 <= col < self.model.numCols):
+            self.controller.updatePositions(row, col)
+
+    def mouseMoveEvent(self, ev: QMouseEvent):
+        if self.panStart is None:
+            return
+        position, originRow, originCol = self.panStart
+        self.originRow = originRow - (ev.pos().y() - position.y()) / self.zoom
+        self.originCol = originCol - (ev.pos().x() - position.x()) / self.zoom
+        self.updateView()
+
+    def mouseReleaseEvent(self, ev: QMouseEvent):
+        if ev.button() in (Qt.RightButton, Qt.MiddleButton):
+            self.panStart = None
+
+    def wheelEvent(self, ev):
+        steps = ev.angleDelta().y() / 120
+        if steps == 0:
+            return
+        x = ev.pos().x()
+        y = ev.pos().y()
+        row = self.originRow + y / self.zoom
+        col = self.originCol + x / self.zoom
+        self.zoom = min(max(self.zoom * ZOOM_STEP ** steps, self.minZoom()), MAX_ZOOM)
+        self.originRow = row - y / self.zoom
+        self.originCol = col - x / self.zoom
+        self.updateView()
+
+    def resizeEvent(self, ev):
+        self.updateView()
+        super().resizeEvent(ev)
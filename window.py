@@ -5,13 +5,14 @@ from PyQt5.QtCore import Qt
 from canvas import CanvasView
 from MVC import Controller, Model
 from buttons import KnownPatternsBox
+from slider import RateLabel, HistorySlider, CycleLabel
 
 from utils import createButtonsForGUI, generateLabelsForGUI
 
 
 class MainWindow(QMainWindow):
 
-    def __init__(self, squareEdge, numRows, numCols):
+    def __init__(self, squareEdge, numRows, numCols, renderer='painter', topology='bounded'):
         super().__init__()
 
         # window
@@ -25,19 +26,37 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Conway's Game of Life")
 
         # since the Canvas object is the core of the GUI, its definition is a bit messy
-        pixmap = QPixmap(self.squareEdge * self.numCols + 1, self.squareEdge * self.numRows + 1)
-        pixmap.fill(Qt.white)
-        # model of the MVC
-        model = Model(self.squareEdge, pixmap.width(), pixmap.height())
-        # views of the MVC, getting the model as argument
-        canvas = CanvasView(pixmap, model)
+        # views of the MVC, getting the model as argument. The 'image' renderer blits the whole grid from a buffer
+        # and is meant for large grids, while the 'painter' one draws each square. The 'viewport' one shows a
+        # zoomable window on boards of any size: its Model doesn't depend on the widget at all, so the board is
+        # just numRows x numCols cells, and squareEdge is the initial zoom. The cycles are only looked for once the
+        # Pause on cycle box is checked. The topology tells what happens at the borders of the board (see
+        # life/model.py). The other renderers are only imported when they're chosen, since importing them delays the
+        # window
+        if renderer == 'viewport':
+            from viewport import ViewportCanvasView
+            model = Model(1, self.numCols, self.numRows, topology=topology, detectCycles=False)
+            canvas = ViewportCanvasView(model, self.squareEdge)
+        else:
+            width = self.squareEdge * self.numCols + 1
+            height = self.squareEdge * self.numRows + 1
+            # model of the MVC
+            model = Model(self.squareEdge, width, height, topology=topology, detectCycles=False)
+            if renderer == 'image':
+                from imagecanvas import ImageCanvasView
+                canvas = ImageCanvasView(model)
+            else:
+                pixmap = QPixmap(width, height)
+                pixmap.fill(Qt.white)
+                canvas = CanvasView(pixmap, model)
+            # an useful canvas property
+            canvas.setFixedSize(self.numCols * self.squareEdge + 1, self.numRows * self.squareEdge + 1)
         knownPatternBox = KnownPatternsBox(model)
         # controller of the MVC
         controller = Controller(model, canvas, knownPatternBox)
+        self.controller = controller
         canvas.addController(controller)
         knownPatternBox.addController(controller)
-        # an useful canvas property
-        canvas.setFixedSize(self.numCols * self.squareEdge + 1, self.numRows * self.squareEdge + 1)
 
         # buttons initialization and layout definition (as a list of widgets)
         fpsSlider, buttons = createButtonsForGUI(canvas, knownPatternBox, controller)
@@ -60,16 +79,22 @@ class MainWindow(QMainWindow):
         sliderLayout.addWidget(minLabel)
         sliderLayout.addWidget(fpsSlider)
         sliderLayout.addWidget(QLabel('60'))
+        sliderLayout.addWidget(RateLabel(controller))
+        historyLayout = QHBoxLayout()
+        historyLayout.addWidget(QLabel('History:'))
+        historyLayout.addWidget(HistorySlider(controller))
+        historyLayout.addWidget(CycleLabel(controller))
 
         # canvasLayout is defined as an horizontal layout formed by two containers, containing the Canvas object on the
         # left and the buttonLayout with all of its buttons on the right.
         canvasLayout = QHBoxLayout()
-        canvasLayout.addWidget(canvas)
+        canvasLayout.addWidget(canvas, 1)
         canvasLayout.addLayout(buttonLayout)
 
         # this is the highest-level layout, that contains both the canvas and the slider in a vertical fashion
         layout = QVBoxLayout()
         layout.addLayout(sliderLayout)
+        layout.addLayout(historyLayout)
         layout.addLayout(canvasLayout)
         widget.setLayout(layout)
 